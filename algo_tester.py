@@ -1,35 +1,128 @@
-import numpy as np
 import multiprocessing as mps
-from datetime import datetime
 
 import task
 import task_gen
-from algorithms import greedy_compression_algorithm, preemptive_scheduling_algorithm, simple_greedy_algorithm
-from heatmap_plot import TaskHeatmap
-from utils import DEBUG_HALT
+from algorithms import greedy_compression_algorithm, preemptive_scheduling_algorithm, simple_greedy_algorithm, \
+    proportional_compression_algorithm, easy_backfilling_algorithm, COLUMNAR_ALGORITHMS, INDEXED_ALGORITHMS
+from capacity_profile import CapacityProfile
+from result_log import format_quantization, format_result, result_collector, result_record, write_results
+from utils import DEBUG_HALT, is_columnar
 
 
 class AlgoTester:
-    def __init__(self, task_list_file, total_bandwidth):
+    def __init__(self, task_list_file, total_bandwidth, time_quantum=1, quantum_reference=False, use_index=False):
         # Initialize the task matrix, total bandwidth, and task list from a JSON file
         self.task_matrix = None
         self.total_bandwidth = total_bandwidth
         self.task_list = task_gen.from_json_file(task_list_file)
+        # With use_index, the arrival order and summary stats of the task list come from its sidecar index (see
+        # task_gen.load_task_list_index). It costs a numpy import and a checksum of the file, which a single test
+        # does not win back.
+        self.arrival_index = None
+        self.task_list_stats = None
+        if use_index:
+            self.arrival_index, self.task_list_stats = task_gen.load_task_list_index(task_list_file, self.task_list)
         self.completed_tasks = []
         self.scores_dict = {}
         self.time_start = 0
         self.time_end = 0
+        # Time units per simulated time step, see time_quantum.py
+        self.time_quantum = time_quantum
+        self.quantized_tasks = None  # Completed tasks of a run in quanta
+        self.quantum_report = None
+        self.quantum_reference = quantum_reference  # Also run in time units to measure the quantization error
 
-    def test(self, algo_fp):
+    @classmethod
+    def from_task_list(cls, task_list, total_bandwidth, time_quantum=1, quantum_reference=False):
+        """
+        Create a tester for an already loaded task list.
+        :param task_list: list of Task objects, or TaskArrays. TaskArrays are left untouched, so one list (e.g.
+            TaskArrays.frozen) can be shared by many testers
+        :param total_bandwidth: total available bandwidth
+        :param time_quantum: time units per simulated time step
+        :param quantum_reference: with a time quantum, also run every test in time units and report the score and
+            end time changes
+        """
+        tester = cls.__new__(cls)
+        tester.task_matrix = None
+        tester.total_bandwidth = total_bandwidth
+        tester.task_list = task_list
+        tester.arrival_index = None
+        tester.task_list_stats = None
+        tester.completed_tasks = []
+        tester.scores_dict = {}
+        tester.time_start = 0
+        tester.time_end = 0
+        tester.time_quantum = time_quantum
+        tester.quantized_tasks = None
+        tester.quantum_report = None
+        tester.quantum_reference = quantum_reference
+        return tester
+
+    def test(self, algo_fp, arrival_index=None):
         """
         Test the given algorithm function pointer.
+        With a time quantum above 1 the algorithm runs on a copy of the task list mapped into quanta, and the
+        completed tasks are mapped back to time units before they are rated. With quantum_reference the algorithm also
+        runs in time units and the report holds the score and end time changes against it.
         :param algo_fp: Algorithm function pointer to be tested.
+        :param arrival_index: ArrivalIndex of the task list shared between tests, default the one of the sidecar index
+            loaded with use_index. Not used with a time quantum.
         """
+        if self.time_quantum > 1:
+            from time_quantum import quantization_report, quantize_tasks, reference_deltas, restore_tasks
+
+            self.quantized_tasks = self.run_algorithm(algo_fp, quantize_tasks(self.task_list, self.time_quantum))
+            self.set_completed_tasks(restore_tasks(self.task_list, self.quantized_tasks, self.time_quantum))
+            self.quantum_report = quantization_report(self.task_list, self.quantized_tasks, self.completed_tasks,
+                                                      self.time_quantum, self.total_bandwidth)
+            if self.quantum_reference:
+                from task_arrays import TaskArrays
+
+                # TaskArrays are left untouched by a run, the task list is kept for the run in quanta
+                task_list = self.task_list if is_columnar(self.task_list) else TaskArrays.from_tasks(self.task_list)
+                reference = AlgoTester.from_task_list(task_list, self.total_bandwidth)
+                reference.test(algo_fp)
+                self.quantum_report.update(reference_deltas(self, reference))
+            return
         # Run the algorithm and store the completed tasks
-        self.completed_tasks = algo_fp(self.task_list, self.total_bandwidth)
+        self.set_completed_tasks(self.run_algorithm(algo_fp, self.task_list, arrival_index or self.arrival_index))
+
+    def run_algorithm(self, algo_fp, task_list, arrival_index=None):
+        """
+        Run an algorithm on a task list. Algorithms with a columnar fast path get TaskArrays as they are and keep
+        their per run state in their own copy of the arrays. The others change the Task objects they schedule, so
+        they get a copy of every task, built from the rows of the arrays (see benchmark.benchmark_run_copy for its
+        cost), and TaskArrays are never changed by a run.
+        :param algo_fp: Algorithm function pointer.
+        :param task_list: list of Task objects (changed by the run) or TaskArrays
+        :param arrival_index: ArrivalIndex of task_list, passed to the algorithms that take one
+        :return: the completed tasks
+        """
+        if is_columnar(task_list) and algo_fp not in COLUMNAR_ALGORITHMS:
+            task_list = task_list.arrays.to_tasks()
+        if arrival_index is not None and algo_fp in INDEXED_ALGORITHMS:
+            return algo_fp(task_list, self.total_bandwidth, arrival_index=arrival_index)
+        return algo_fp(task_list, self.total_bandwidth)
+
+    def set_completed_tasks(self, completed_tasks):
+        """
+        Store and rate the results of a run.
+        :param completed_tasks: list of completed Task objects, or TaskArrays (from a columnar run or a result
+            cache, left untouched) that is copied into a LazyTaskList, so no Task object is built for the aggregates
+        """
+        if is_columnar(completed_tasks):
+            from task_arrays import LazyTaskList
+            # Rating writes the score column, the given arrays may be frozen or shared by other testers
+            completed_tasks = LazyTaskList(completed_tasks.arrays.copy())
+        self.completed_tasks = completed_tasks
         # Determine the earliest task start time and the latest task end time
-        self.time_start = min(one_task.created_time for one_task in self.completed_tasks)
-        self.time_end = max(one_task.actual_end_time for one_task in self.completed_tasks)
+        if is_columnar(self.completed_tasks):
+            self.time_start = int(self.completed_tasks.arrays.created_time.min())
+            self.time_end = int(self.completed_tasks.arrays.actual_end_time.max())
+        else:
+            self.time_start = min(one_task.created_time for one_task in self.completed_tasks)
+            self.time_end = max(one_task.actual_end_time for one_task in self.completed_tasks)
         self.rate_tasks()  # Calculate the score for each task
 
     def rate_tasks(self):
@@ -40,13 +133,16 @@ class AlgoTester:
         priority_names = [name for name, member in task.TaskPriority.__members__.items()]
         # Initialize scores dictionary with priorities
         self.scores_dict = {priority: [0, 0, 0] for priority in priority_names}
-        for one_task in self.completed_tasks:
-            # Calculate the score for each task based on start times
-            one_task.rate()
-            # Update the scores dictionary
-            task_priority = one_task.priority.name
-            self.scores_dict[task_priority][0] += 1
-            self.scores_dict[task_priority][1] += one_task.score
+        if is_columnar(self.completed_tasks):
+            self.rate_task_arrays(self.completed_tasks.arrays)
+        else:
+            for one_task in self.completed_tasks:
+                # Calculate the score for each task based on start times
+                one_task.rate()
+                # Update the scores dictionary
+                task_priority = one_task.priority.name
+                self.scores_dict[task_priority][0] += 1
+                self.scores_dict[task_priority][1] += one_task.score
         # Calculate the average score for each priority
         for one_prio in self.scores_dict:
             tasks_num = self.scores_dict[one_prio][0]
@@ -58,6 +154,24 @@ class AlgoTester:
             self.scores_dict[one_prio][2] = avg_score
         return self.scores_dict
 
+    def rate_task_arrays(self, task_arrays):
+        """
+        Rate columnar tasks like Task.rate and add them to the scores dictionary.
+        :param task_arrays: TaskArrays owned by the tester, their score column is set
+        """
+        import numpy as np
+        from task_arrays import COLUMN_INDEX
+
+        start_times = task_arrays.actual_start_time
+        scores = start_times - task_arrays.created_time
+        stretch = task_arrays.actual_end_time - start_times - task_arrays.total_duration
+        scores += np.where(task_arrays.duration_changed != 0, stretch, 0)
+        task_arrays.states[:, COLUMN_INDEX["score"]] = scores
+        for one_prio in task.TaskPriority:
+            in_priority = task_arrays.priority == one_prio
+            self.scores_dict[one_prio.name][0] += int(np.count_nonzero(in_priority))
+            self.scores_dict[one_prio.name][1] += int(scores[in_priority].sum())
+
     def avg_score_per_priority_str(self):
         """
         Return a string representation of the average score per priority.
@@ -66,81 +180,214 @@ class AlgoTester:
         for one_prio in self.scores_dict.keys():
             ret += "{}:{} ".format(one_prio, self.scores_dict[one_prio][2])
         ret += ". Total Start Time: {}, Total End Time: {}".format(self.time_start, self.time_end)
+        if self.quantum_report:
+            ret += ". " + format_quantization(self.quantum_report)
         return ret
 
     def create_task_matrix(self):
         """
         Create a task matrix representing the allocation of tasks over time and bandwidth.
+        Task bandwidth is reserved in a capacity profile to make sure the link is never over-allocated, then each
+        task fills the next free rows of the time columns it runs in, with the bandwidth it had in each of them.
+        After a run with a time quantum the matrix has one column per quantum, built from the run in quanta.
         """
-        self.task_matrix = np.zeros((self.total_bandwidth, self.time_end + 1), dtype=int)
-        for one_task in self.completed_tasks:
-            for time in range(one_task.actual_start_time, one_task.actual_end_time + 1):
-                allocated = False
-                for bw in range(self.total_bandwidth):
-                    # Check if the bandwidth is available for the task at the given time
-                    if all(self.task_matrix[bw:bw + one_task.bandwidth, time] == 0):
-                        self.task_matrix[bw:bw + one_task.bandwidth, time] = one_task.id
-                        allocated = True
-                        break
-                if not allocated:
-                    DEBUG_HALT()
+        import numpy as np
+
+        completed_tasks = self.completed_tasks
+        time_end = self.time_end
+        if self.quantized_tasks is not None:
+            completed_tasks = self.quantized_tasks
+            if is_columnar(completed_tasks):
+                time_end = int(completed_tasks.arrays.actual_end_time.max())
+            else:
+                time_end = max(one_task.actual_end_time for one_task in completed_tasks)
+        self.task_matrix = np.zeros((self.total_bandwidth, time_end + 1), dtype=int)
+        profile = CapacityProfile(self.total_bandwidth, horizon=time_end + 1)
+        filled_rows = np.zeros(time_end + 1, dtype=int)  # Number of allocated rows per time column
+        for task_id, start_time, end_time, bandwidth in task_segments(completed_tasks):
+            profile.reserve(start_time, end_time, bandwidth)
+            # Check if the bandwidth is available for the task during its run
+            if profile.min_free(start_time, end_time) < 0:
+                DEBUG_HALT()
+            time_columns = np.arange(start_time, end_time)
+            for bw in range(bandwidth):
+                self.task_matrix[filled_rows[start_time:end_time] + bw, time_columns] = task_id
+            filled_rows[start_time:end_time] += bandwidth
         # Sort the matrix for each time unit
-        for time in range(self.time_end + 1):
-            self.task_matrix[:, time] = np.sort(self.task_matrix[:, time])
+        self.task_matrix.sort(axis=0)
 
     def show_heatmap_plot(self):
         """
         Show a heatmap plot of the task matrix.
         """
+        from heatmap_plot import TaskHeatmap
+
         self.create_task_matrix()  # Create the task matrix
         heatmap_plot = TaskHeatmap(task_matrix=self.task_matrix)
         heatmap_plot.show_plot()
 
 
-def algo_worker(l, algo_fp, algo_name, task_list_type, value_tuple, max_bandwidth, log_file=None):
+
+def task_segments(completed_tasks):
+    """
+    Bandwidth segments of the runs of completed tasks, a compressed task has one per bandwidth it ran with.
+    :param completed_tasks: list of completed Task objects, or TaskArrays
+    :return: iterator of (task id, start time, end time (exclusive), bandwidth)
+    """
+    if is_columnar(completed_tasks):
+        arrays = completed_tasks.arrays
+        return zip(arrays.id.tolist(), arrays.actual_start_time.tolist(), (arrays.actual_end_time + 1).tolist(),
+                   arrays.bandwidth.tolist())
+    return ((one_task.id, start_time, end_time, bandwidth) for one_task in completed_tasks
+            for start_time, end_time, bandwidth in one_task.bandwidth_segments())
+
+
+def peak_usage(completed_tasks):
+    """
+    Highest bandwidth completed tasks use together in a time unit, a schedule is within its link when it is at most
+    the link bandwidth.
+    :param completed_tasks: list of completed Task objects, or TaskArrays
+    :return: peak bandwidth
+    """
+    import numpy as np
+
+    segments = np.array([segment[1:] for segment in task_segments(completed_tasks)], dtype=np.int64).reshape(-1, 3)
+    if not len(segments):
+        return 0
+    usage = np.zeros(int(segments[:, 1].max()) + 1, dtype=np.int64)
+    np.add.at(usage, segments[:, 0], segments[:, 2])
+    np.add.at(usage, segments[:, 1], -segments[:, 2])
+    return int(np.cumsum(usage).max())
+
+def plan_sweep(task_arrays, algo_functions, bandwidths, max_time_end=None, stats=None):
+    """
+    Choose the bandwidths worth testing every algorithm with, hopeless ones are left out (see
+    load_analysis.prune_bandwidths).
+    :param task_arrays: TaskArrays of the task list, not used with stats
+    :param algo_functions: list of (algorithm function pointer, algorithm name)
+    :param bandwidths: total bandwidths to test every algorithm with
+    :param max_time_end: also leave out the bandwidths that can not finish the task list by this time
+    :param stats: summary stats of the task list (see task_gen.task_list_stats, e.g. from its sidecar index), default
+        compute them once for all the algorithms
+    :return: tuple of (list of (algorithm function pointer, algorithm name, list of bandwidths), dictionary of
+        (algorithm name, pruned bandwidth) -> reason)
+    """
+    from load_analysis import prune_bandwidths
+
+    if stats is None:
+        stats = task_gen.task_list_stats(task_arrays.arrays)
+    runs = []
+    pruned = {}
+    for algo_fp, algo_name in algo_functions:
+        algo_bandwidths, algo_pruned = prune_bandwidths(None, bandwidths, max_time_end, [algo_fp], stats)
+        runs.append((algo_fp, algo_name, algo_bandwidths))
+        pruned.update(((algo_name, total_bandwidth), reason) for total_bandwidth, reason in algo_pruned.items())
+    return runs, pruned
+
+
+def sweep(task_arrays, runs, time_quantum=1, arrival_index=None, quantum_reference=False):
+    """
+    Test many algorithms and bandwidths on one loaded task list in this process.
+    :param task_arrays: TaskArrays of the task list, every run works on its own state and leaves them untouched
+    :param runs: list of (algorithm function pointer, algorithm name, list of bandwidths to test it with), see
+        plan_sweep
+    :param time_quantum: time units per simulated time step
+    :param arrival_index: ArrivalIndex of the task list (e.g. from task_gen.load_task_list_index), default build it
+    :param quantum_reference: with a time quantum, also run every test in time units, see AlgoTester.from_task_list
+    :return: generator of (algorithm name, total bandwidth, tested AlgoTester)
+    """
+    from arrival_index import ArrivalIndex
+
+    task_specs = task_arrays.frozen()
+    if time_quantum != 1:
+        arrival_index = None  # The runs get the task list mapped into quanta
+    elif arrival_index is None:
+        arrival_index = ArrivalIndex(task_specs)
+    for algo_fp, algo_name, bandwidths in runs:
+        for total_bandwidth in bandwidths:
+            tester = AlgoTester.from_task_list(task_specs, total_bandwidth, time_quantum, quantum_reference)
+            tester.test(algo_fp, arrival_index)
+            yield algo_name, total_bandwidth, tester
+
+
+def compare_policies(task_arrays, algo_functions, total_bandwidth):
+    """
+    Test several algorithms on one task list, its arrival stream is grouped and sorted by priority once for all of
+    them (see arrival_index.py). An algorithm that can never finish the list with total_bandwidth is left out.
+    :param task_arrays: TaskArrays of the task list, left untouched
+    :param algo_functions: list of (algorithm function pointer, algorithm name)
+    :param total_bandwidth: total available bandwidth
+    :return: dictionary of algorithm name -> scores_dict of its test, in algo_functions order
+    """
+    runs, _ = plan_sweep(task_arrays, algo_functions, [total_bandwidth])
+    return {algo_name: tester.scores_dict for algo_name, _, tester in sweep(task_arrays, runs)}
+
+
+def comparison_str(scores_by_algo):
+    """
+    Return the average scores of compare_policies side by side, one row per priority and one column per algorithm.
+    """
+    algo_names = list(scores_by_algo)
+    widths = [max(len(algo_name), 8) for algo_name in algo_names]
+    ret = "{:<12}".format("Priority") + " ".join("{:>{}}".format(algo_name, width)
+                                                for algo_name, width in zip(algo_names, widths))
+    for one_prio in task.TaskPriority.__members__:
+        ret += "\n{:<12}".format(one_prio) + " ".join("{:>{}}".format(scores_by_algo[algo_name][one_prio][2], width)
+                                                     for algo_name, width in zip(algo_names, widths))
+    return ret
+
+
+def algo_worker(result_queue, algo_fp, algo_name, task_list_type, value_tuple, max_bandwidth, time_quantum=1,
+                quantum_reference=False):
     """
     Worker function that runs algorithms in multiple processes.
-    :param log_file: log file to write to, default no log file
-    :param l: multiprocessing Lock object
+    :param result_queue: multiprocessing Queue the result record is sent on, see result_log.result_collector
     :param algo_fp: Function pointer to the algorithm.
     :param algo_name: Name of the algorithm for display purposes.
     :param task_list_type: Type or identifier of the task list being processed.
     :param value_tuple: Tuple containing the task list file and its description.
     :param max_bandwidth: Maximum bandwidth per task.
+    :param time_quantum: Time units per simulated time step.
+    :param quantum_reference: With a time quantum, also run the test in time units to report the error.
     :return: None.
     """
     task_list_file = value_tuple[0]  # Extract the task list file from the tuple
     explanation_string = value_tuple[1]  # Extract the explanation string from the tuple
-    tester = AlgoTester(task_list_file, max_bandwidth)  # Initialize the AlgoTester with the task list and bandwidth
+    # Initialize the AlgoTester with the task list and bandwidth
+    tester = AlgoTester(task_list_file, max_bandwidth, time_quantum, quantum_reference)
     tester.test(algo_fp)  # Run the algorithm function on the tester
-    # Output the results
-    now = datetime.now()
-    date_time = f"Run Time: {now.strftime("%m/%d/%Y, %H:%M:%S")}"
-    task_list_str = f"{task_list_type}: {explanation_string}"
-    algo_score_str = f"{algo_name} average score for Task List \"{task_list_type}\": {tester.avg_score_per_priority_str()}\n"
-    l.acquire()  # acquire lock for printing
-    # if given log file name, write to log
-    if log_file:
-        with open(log_file, "a+") as f:
-            f.write(date_time + "\n")
-            f.write(task_list_str + "\n")
-            f.write(algo_score_str + "\n")
-    print(date_time)
-    print(task_list_str)
-    print(algo_score_str)
+    # Send the results to the collector, printing and logging are done there
+    result_queue.put(result_record(tester, algo_name, task_list_type, explanation_string))
     # Uncomment the next line to show heatmap plots if needed
     # tester.show_heatmap_plot()
-    l.release()  # release lock for printing
 
 
-def main(log_file=None, clear_log=True):
+def main(log_file=None, clear_log=True, time_quantum=1, bandwidths=None, in_process=False, max_time_end=None,
+         quantum_reference=True):
+    """
+    Test all algorithms on all task lists.
+    :param log_file: JSON Lines file of the result records, default no log file
+    :param clear_log: empty the log file first
+    :param time_quantum: time units per simulated time step
+    :param bandwidths: total bandwidths to test, default the maximum bandwidth only
+    :param in_process: load every task list once and run all tests in this process (see sweep), instead of one
+        process per test
+    :param max_time_end: skip the bandwidths that can not finish a task list by this time
+    :param quantum_reference: with a time quantum, also run every test in time units and report the score and end
+        time changes quantization adds
+    """
+    from task_arrays import TaskArrays
+
     if log_file and clear_log:
         open(log_file, "w").close()
     max_bandwidth = 50  # Define the maximum bandwidth
+    bandwidths = bandwidths or [max_bandwidth]
     # List of algorithms and their names
     algo_functions = [(simple_greedy_algorithm, "Simple greedy algorithm"),
                       (greedy_compression_algorithm, "Greedy compression algorithm"),
-                      (preemptive_scheduling_algorithm, "Preemptive scheduling algorithm")]
+                      (preemptive_scheduling_algorithm, "Preemptive scheduling algorithm"),
+                      (proportional_compression_algorithm, "Proportional compression algorithm"),
+                      (easy_backfilling_algorithm, "EASY backfilling algorithm")]
     # Dictionary mapping task list types to their respective files and descriptions
     task_lists_dict = {"Random": ("task_list_random.json", "Generated queue of random tasks"),
                        "A": ("task_list_a.json",
@@ -150,20 +397,54 @@ def main(log_file=None, clear_log=True):
                        "C": ("task_list_c.json",
                              "Created chunks of three tasks of same priority, first will be 0.6 of max bandwidth, two more will be exactly half bandwidth")}
 
+    # Leave out the hopeless bandwidths of every algorithm on every task list, once for both modes. The stats of the
+    # sidecar index are enough for it, only the in process runs load the task lists.
+    loaded_lists = {}
+    arrival_indexes = {}
+    sweep_runs = {}
+    for key, (task_list_file, _) in task_lists_dict.items():
+        if in_process:
+            loaded_lists[key] = TaskArrays.from_json_file(task_list_file)
+        arrival_indexes[key], stats = task_gen.load_task_list_index(task_list_file, loaded_lists.get(key))
+        sweep_runs[key], pruned = plan_sweep(loaded_lists.get(key), algo_functions, bandwidths, max_time_end, stats)
+        for (algo_name, total_bandwidth), reason in pruned.items():
+            print("Task List \"{}\": skipping {} with total bandwidth {}, {}".format(key, algo_name, total_bandwidth,
+                                                                                    reason))
+
+    if in_process:
+        for key, (_, explanation_string) in task_lists_dict.items():
+            records = []
+            # One sorted arrival stream for all the runs on the list, from the sidecar index of its file
+            for algo_name, _, tester in sweep(loaded_lists[key], sweep_runs[key], time_quantum, arrival_indexes[key],
+                                                  quantum_reference):
+                records.append(result_record(tester, algo_name, key, explanation_string))
+                print(format_result(records[-1]))
+            if log_file:
+                write_results(records, log_file)
+        return
+
     procs = []  # List to keep track of process objects
-    lock = mps.Lock()
-    # Create a process for each algorithm on each task list
-    for algo_fp, algo_name in algo_functions:
+    result_queue = mps.Queue()
+    # A single collector prints and logs the results of all workers
+    collector = mps.Process(target=result_collector, args=(result_queue, log_file,))
+    collector.start()
+    # Create a process for each algorithm on each task list, with every bandwidth worth testing
+    for algo_index, (algo_fp, algo_name) in enumerate(algo_functions):
         for key, value_tuple in task_lists_dict.items():
-            p = mps.Process(target=algo_worker, args=(lock, algo_fp, algo_name, key, value_tuple, max_bandwidth, log_file,))
-            procs.append(p)  # Add the process to the list
+            _, _, algo_bandwidths = sweep_runs[key][algo_index]
+            for total_bandwidth in algo_bandwidths:
+                p = mps.Process(target=algo_worker, args=(result_queue, algo_fp, algo_name, key, value_tuple,
+                                                          total_bandwidth, time_quantum, quantum_reference,))
+                procs.append(p)  # Add the process to the list
     # Start each process
     for p in procs:
         p.start()
     # Wait for all processes to finish
     for p in procs:
         p.join()
+    result_queue.put(None)  # Stop the collector once it wrote all results
+    collector.join()
 
 
 if __name__ == "__main__":
-    main("log.txt", clear_log=True)  # Run the main function
+    main("results.jsonl", clear_log=True)  # Run the main function
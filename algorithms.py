@@ -1,7 +1,13 @@
+import os
+from bisect import insort
 from collections import deque
+from heapq import heappop, heappush
 
-from task import TaskStatus
-from utils import DEBUG_HALT
+from capacity_profile import CapacityProfile
+from checkpoint import (CheckpointPolicyException, SchedulerState, completed_log_path, load_checkpoint, save_checkpoint,
+                        scheduler_policy, state_tasks, timeline_completed_log, timeline_path)
+from task import TaskPriority, TaskStatus
+from utils import DEBUG_HALT, is_columnar
 
 
 def sort_list(orig_list, prop, is_reverse=False):
@@ -29,12 +35,187 @@ def compare_lists(list1, list2):
     return diff_set
 
 
-def simple_greedy_algorithm(task_list, total_bandwidth):
+# Weight of a task of every priority tier in batch admission, see pack_time_slice
+PACKING_WEIGHTS = {TaskPriority.REGULAR: 1, TaskPriority.PREMIUM: 3, TaskPriority.ENTERPRISE: 9}
+
+
+def packing_value(one_task):
+    """
+    Worth of admitting a waiting task now: its priority weight times its response ratio (waiting time + duration) /
+    duration, so short tasks are worth more and the worth of a deferred task grows with its waiting time.
+    """
+    waited = one_task.actual_start_time - one_task.created_time  # A deferred task waits in the current time slice
+    return PACKING_WEIGHTS[one_task.priority] * (waited + one_task.total_duration + 1) / (one_task.total_duration + 1)
+
+
+def pack_time_slice(one_queue, free_bandwidth):
+    """
+    Look-ahead batch admission: reorder the tasks of one time slice so that the set of tasks worth the most (see
+    packing_value) that fits the free bandwidth comes first, a 0/1 knapsack solved by dynamic programming over the
+    free bandwidth. Tasks that were not packed follow in their order, so the admission loop still tries them (or
+    compresses/preempts for them). A time slice whose fitting tasks all fit together skips the dynamic programming.
+    :param one_queue: tasks of the time slice, sorted by priority (highest first)
+    :param free_bandwidth: currently free bandwidth
+    :return: deque of the same tasks in admission order
+    """
+    if len(one_queue) < 2:
+        return deque(one_queue)
+    fitting = deque()
+    not_fitting = []
+    fitting_bandwidth = 0
+    for one_task in one_queue:
+        bandwidth = one_task.bandwidth
+        if 0 < bandwidth <= free_bandwidth:
+            fitting.append(one_task)
+            fitting_bandwidth += bandwidth
+        else:
+            not_fitting.append(one_task)
+    if fitting_bandwidth <= free_bandwidth:
+        # Every task that fits on its own fits together with the others, the best packing takes them all
+        fitting.extend(not_fitting)
+        return fitting
+    one_queue = list(one_queue)
+    # At most free_bandwidth // bandwidth tasks of one bandwidth fit, only the ones worth the most are candidates
+    by_bandwidth = {}
+    for position, one_task in enumerate(one_queue):
+        if 0 < one_task.bandwidth <= free_bandwidth:
+            by_bandwidth.setdefault(one_task.bandwidth, []).append((packing_value(one_task), -position))
+    candidates = []
+    for bandwidth, values in by_bandwidth.items():
+        values.sort(reverse=True)  # among equal values prefer earlier tasks
+        candidates.extend((bandwidth, value, -neg_position)
+                          for value, neg_position in values[:free_bandwidth // bandwidth])
+    best = [0.0] * (free_bandwidth + 1)  # best[b]: worth of the best packing into b bandwidth so far
+    taken = []  # taken[k][b]: candidate k is in the best packing into b bandwidth of the candidates up to k
+    for bandwidth, value, position in candidates:
+        row = bytearray(free_bandwidth + 1)
+        for b in range(free_bandwidth, bandwidth - 1, -1):
+            if best[b - bandwidth] + value > best[b]:
+                best[b] = best[b - bandwidth] + value
+                row[b] = 1
+        taken.append(row)
+    packed = set()
+    b = free_bandwidth
+    for k in range(len(candidates) - 1, -1, -1):
+        if taken[k][b]:
+            bandwidth, value, position = candidates[k]
+            packed.add(position)
+            b -= bandwidth
+    ret = deque(one_task for position, one_task in enumerate(one_queue) if position in packed)
+    ret.extend(one_task for position, one_task in enumerate(one_queue) if position not in packed)
+    return ret
+
+
+def simple_greedy_arrays(task_arrays, total_bandwidth):
+    """
+    Simple greedy algorithm over columnar task arrays, without building Task objects. It reproduces the time
+    slices of simple_greedy_algorithm exactly: a task deferred from a time slice waits in the next one behind the
+    tasks arriving there, and a finished task leaves the processing queue on the first time slice processed after
+    its end time, the task right after it in the queue on the next one.
+    Tasks must be fresh (see TaskArrays.is_fresh) and fit the total bandwidth.
+    :param task_arrays: TaskArrays of the tasks to execute, left untouched
+    :param total_bandwidth: Total available bandwidth
+    :return: TaskArrays of the completed tasks, in completion order
+    """
+    import numpy as np
+    from task_arrays import COLUMN_INDEX
+
+    bandwidths = task_arrays.bandwidth.tolist()
+    durations = task_arrays.total_duration.tolist()
+    neg_priorities = -task_arrays.priority
+    bandwidth_column = task_arrays.bandwidth
+    # time slices of the initial start times, every slice holds its tasks in task list order
+    arrival_order = np.argsort(task_arrays.actual_start_time, kind="stable")
+    slice_times, slice_offsets = np.unique(task_arrays.actual_start_time[arrival_order], return_index=True)
+    slice_times = slice_times.tolist()
+    slice_offsets = slice_offsets.tolist() + [len(arrival_order)]
+
+    start_times = [0] * len(task_arrays)
+    end_times = [0] * len(task_arrays)
+    processing = []  # rows of running tasks, in admission order
+    completed = []  # rows of completed tasks, in completion order
+    deferred = np.empty(0, dtype=np.int64)  # rows deferred to the next time slice, in admission order
+    next_slice = 0
+    next_end = None  # earliest end time of the running tasks
+    current_time = 0
+    while next_slice < len(slice_times) or len(deferred) or processing:
+        if next_end is not None and next_end < current_time:
+            # Finish pass, the task following a finished one is checked again on the next time slice only
+            i = 0
+            while i < len(processing):
+                row = processing[i]
+                if end_times[row] < current_time:
+                    del processing[i]
+                    total_bandwidth += bandwidths[row]
+                    completed.append(row)
+                i += 1
+            next_end = min((end_times[row] for row in processing), default=None)
+
+        if len(deferred):
+            current_time += 1
+        elif next_slice < len(slice_times):
+            current_time = slice_times[next_slice]
+        else:
+            # Nothing waits, skip straight to the time slice that finishes the next task
+            current_time += 1
+            if next_end is not None:
+                current_time = max(current_time, next_end + 1)
+            continue
+        one_slice = deferred
+        if next_slice < len(slice_times) and slice_times[next_slice] == current_time:
+            arrivals = arrival_order[slice_offsets[next_slice]:slice_offsets[next_slice + 1]]
+            one_slice = np.concatenate((arrivals, deferred))
+            next_slice += 1
+        one_slice = one_slice[np.argsort(neg_priorities[one_slice], kind="stable")]
+        admitted = np.zeros(len(one_slice), dtype=bool)
+        slice_bandwidths = bandwidth_column[one_slice]
+        position = 0
+        while True:
+            fitting = np.flatnonzero(slice_bandwidths[position:] <= total_bandwidth)
+            if not len(fitting):
+                break
+            position += int(fitting[0])
+            row = int(one_slice[position])
+            admitted[position] = True
+            total_bandwidth -= bandwidths[row]
+            start_times[row] = current_time
+            end_times[row] = current_time + durations[row]
+            processing.append(row)
+            if next_end is None or end_times[row] < next_end:
+                next_end = end_times[row]
+            position += 1
+        deferred = one_slice[~admitted]
+        if len(deferred) and total_bandwidth < bandwidth_column[deferred].min():
+            # No deferred task fits until a task finishes or new tasks arrive, skip the time slices in between
+            next_time = next_end + 2
+            if next_slice < len(slice_times):
+                next_time = min(next_time, slice_times[next_slice])
+            current_time = max(current_time, next_time - 1)
+
+    if len(completed) != len(task_arrays):  # check if there are lost tasks
+        DEBUG_HALT()
+    ret = task_arrays.copy()
+    ret.states[:, COLUMN_INDEX["actual_start_time"]] = start_times
+    ret.states[:, COLUMN_INDEX["preempted_time"]] = start_times
+    ret.states[:, COLUMN_INDEX["status"]] = TaskStatus.FINISHED
+    return ret.take(completed)
+
+
+def simple_greedy_algorithm(task_list, total_bandwidth, batch_admission=False, arrival_index=None, state=None,
+                            stop_time=None):
     """
     Execute tasks using a simple greedy algorithm.
-    :param task_list: List of tasks to execute
+    :param task_list: List of tasks to execute, or TaskArrays (or LazyTaskList) to run the columnar fast path (simple_greedy_arrays)
     :param total_bandwidth: Total available bandwidth
-    :return: List of completed tasks
+    :param batch_admission: pack the tasks of every time slice before admitting them, see pack_time_slice
+    :param arrival_index: ArrivalIndex of task_list shared between runs (see arrival_index.py), its time slices are
+        already grouped and sorted by priority
+    :param state: SchedulerState to continue a stopped run from, task_list and total_bandwidth are then ignored
+    :param stop_time: stop before processing the first time slice at or after stop_time and return the state reached
+        instead of running to the end. Tasks arriving at or after stop_time can not change that state, so they can
+        be added to its waiting queue and the run continued from it (see sharding.py)
+    :return: List of completed tasks, TaskArrays of the completed tasks when given TaskArrays, or the SchedulerState
+        reached with stop_time
     """
     def group_tasks_by_time():
         """Group tasks by their start time and add them to the waiting queue."""
@@ -48,6 +229,8 @@ def simple_greedy_algorithm(task_list, total_bandwidth):
         start_time = one_task.actual_start_time
         if start_time not in waitingTaskQueue:
             waitingTaskQueue[start_time] = deque()
+        elif waitingTaskQueue[start_time] and waitingTaskQueue[start_time][-1].priority < one_task.priority:
+            unsortedTimes.add(start_time)  # Appended out of priority order, sort the time slice before admission
         waitingTaskQueue[start_time].append(one_task)
 
     def add_task_to_processing_queue(new_task):
@@ -78,14 +261,41 @@ def simple_greedy_algorithm(task_list, total_bandwidth):
         remove_task_from_processing_queue(one_task)
         completedQueue.append(one_task)
 
-    waitingTaskQueue = {}  # Initialize waiting queue grouped by start time
-    group_tasks_by_time()
-    processingQueue = []  # Initialize processing queue
-    completedQueue = []  # Initialize completed tasks queue
-    orig_bandwidth = total_bandwidth  # Store original bandwidth
-    current_time = 0
+    if is_columnar(task_list):
+        from task_arrays import TaskArrays
+        task_list = task_list.arrays
+        if (not batch_admission and task_list.is_fresh() and len(task_list) and
+                0 <= task_list.bandwidth.min() and task_list.bandwidth.max() <= total_bandwidth):
+            return simple_greedy_arrays(task_list, total_bandwidth)
+        # Exotic input, run the object path on materialized tasks
+        return TaskArrays.from_tasks(simple_greedy_algorithm(task_list.to_tasks(), total_bandwidth,
+                                                             batch_admission, arrival_index))
+
+    unsortedTimes = set()  # Time slices whose tasks are not in priority order
+    if state is not None:
+        # Continue a stopped run
+        waitingTaskQueue = state.waiting_queue
+        unsortedTimes.update(waitingTaskQueue)  # The order of restored time slices is not known
+        processingQueue = state.processing_queue
+        completedQueue = state.completed_queue
+        orig_bandwidth = state.orig_bandwidth
+        total_bandwidth = state.total_bandwidth
+        current_time = state.current_time
+        task_list = state_tasks(state)
+    else:
+        if arrival_index is not None:
+            waitingTaskQueue = arrival_index.waiting_queue(task_list)  # Time slices already in priority order
+        else:
+            waitingTaskQueue = {}  # Initialize waiting queue grouped by start time
+            group_tasks_by_time()
+        processingQueue = []  # Initialize processing queue
+        completedQueue = []  # Initialize completed tasks queue
+        orig_bandwidth = total_bandwidth  # Store original bandwidth
+        current_time = 0
 
     while waitingTaskQueue or processingQueue:  # run while there are tasks in waiting or operation
+        if stop_time is not None and not any(one_time < stop_time for one_time in waitingTaskQueue):
+            break  # The next time slice is at or after stop_time
 
         # Go over processing queue and remove tasks that are done
         for one_task in processingQueue:
@@ -96,7 +306,11 @@ def simple_greedy_algorithm(task_list, total_bandwidth):
         try:
             current_time = sorted(waitingTaskQueue.keys())[0]
             one_queue = waitingTaskQueue.pop(current_time)  # Pop the processed time slice from the waiting queue
-            one_queue = deque(sort_list(one_queue, 'priority', is_reverse=True))
+            if current_time in unsortedTimes:  # A stable sort leaves a time slice in priority order as it is
+                unsortedTimes.discard(current_time)
+                one_queue = deque(sort_list(one_queue, 'priority', is_reverse=True))
+            if batch_admission:
+                one_queue = pack_time_slice(one_queue, total_bandwidth)
             while one_queue:
                 one_task = one_queue.popleft()
                 if one_task.bandwidth <= total_bandwidth:
@@ -108,6 +322,10 @@ def simple_greedy_algorithm(task_list, total_bandwidth):
             current_time += 1  # advance current time
             continue  # No tasks at the current time, move forward
 
+    if stop_time is not None:
+        return SchedulerState(waitingTaskQueue, processingQueue, completedQueue, current_time, total_bandwidth,
+                              orig_bandwidth, -1)
+
     # check if there are lost tasks
     diff_list = compare_lists(task_list, completedQueue)
     if diff_list:
@@ -116,12 +334,18 @@ def simple_greedy_algorithm(task_list, total_bandwidth):
     return list(completedQueue)
 
 
-def greedy_compression_algorithm(task_list, total_bandwidth):
+def greedy_compression_algorithm(task_list, total_bandwidth, batch_admission=False, arrival_index=None, state=None,
+                                 stop_time=None):
     """
     Execute tasks using a simple greedy algorithm.
     :param task_list: List of tasks to execute
     :param total_bandwidth: Total available bandwidth
-    :return: List of completed tasks
+    :param batch_admission: pack the tasks of every time slice before admitting them, see pack_time_slice
+    :param arrival_index: ArrivalIndex of task_list shared between runs (see arrival_index.py), its time slices are
+        already grouped and sorted by priority
+    :param state: SchedulerState to continue a stopped run from, task_list and total_bandwidth are then ignored
+    :param stop_time: stop before processing the first time slice at or after stop_time, see simple_greedy_algorithm
+    :return: List of completed tasks, or the SchedulerState reached with stop_time
     """
     def group_tasks_by_time():
         """Group tasks by their start time and add them to the waiting queue."""
@@ -135,6 +359,8 @@ def greedy_compression_algorithm(task_list, total_bandwidth):
         start_time = one_task.actual_start_time
         if start_time not in waitingTaskQueue:
             waitingTaskQueue[start_time] = deque()
+        elif waitingTaskQueue[start_time] and waitingTaskQueue[start_time][-1].priority < one_task.priority:
+            unsortedTimes.add(start_time)  # Appended out of priority order, sort the time slice before admission
         waitingTaskQueue[start_time].append(one_task)
 
     def add_task_to_processing_queue(new_task):
@@ -165,15 +391,32 @@ def greedy_compression_algorithm(task_list, total_bandwidth):
         remove_task_from_processing_queue(one_task)
         completedQueue.append(one_task)
 
-    waitingTaskQueue = {}  # Initialize waiting queue grouped by start time
-    group_tasks_by_time()
-    processingQueue = []  # Initialize processing queue
-    completedQueue = []  # Initialize completed tasks queue
-    orig_bandwidth = total_bandwidth  # Store original bandwidth
-    current_time = 0
+    unsortedTimes = set()  # Time slices whose tasks are not in priority order
+    if state is not None:
+        # Continue a stopped run
+        waitingTaskQueue = state.waiting_queue
+        unsortedTimes.update(waitingTaskQueue)  # The order of restored time slices is not known
+        processingQueue = state.processing_queue
+        completedQueue = state.completed_queue
+        orig_bandwidth = state.orig_bandwidth
+        total_bandwidth = state.total_bandwidth
+        current_time = state.current_time
+        task_list = state_tasks(state)
+    else:
+        if arrival_index is not None:
+            waitingTaskQueue = arrival_index.waiting_queue(task_list)  # Time slices already in priority order
+        else:
+            waitingTaskQueue = {}  # Initialize waiting queue grouped by start time
+            group_tasks_by_time()
+        processingQueue = []  # Initialize processing queue
+        completedQueue = []  # Initialize completed tasks queue
+        orig_bandwidth = total_bandwidth  # Store original bandwidth
+        current_time = 0
     compression_success = False
 
     while waitingTaskQueue or processingQueue:  # run while there are tasks in waiting or operation
+        if stop_time is not None and not any(one_time < stop_time for one_time in waitingTaskQueue):
+            break  # The next time slice is at or after stop_time
 
         # Go over processing queue and remove tasks that are done
         for one_task in processingQueue:
@@ -184,7 +427,11 @@ def greedy_compression_algorithm(task_list, total_bandwidth):
         try:
             current_time = sorted(waitingTaskQueue.keys())[0]
             one_queue = waitingTaskQueue.pop(current_time)  # Pop the processed time slice from the waiting queue
-            one_queue = deque(sort_list(one_queue, 'priority', is_reverse=True))
+            if current_time in unsortedTimes:  # A stable sort leaves a time slice in priority order as it is
+                unsortedTimes.discard(current_time)
+                one_queue = deque(sort_list(one_queue, 'priority', is_reverse=True))
+            if batch_admission:
+                one_queue = pack_time_slice(one_queue, total_bandwidth)
             while one_queue:
                 one_task = one_queue.popleft()
                 if one_task.bandwidth <= total_bandwidth:
@@ -213,6 +460,10 @@ def greedy_compression_algorithm(task_list, total_bandwidth):
             current_time += 1  # advance current time
             continue  # No tasks at the current time, move forward
 
+    if stop_time is not None:
+        return SchedulerState(waitingTaskQueue, processingQueue, completedQueue, current_time, total_bandwidth,
+                              orig_bandwidth, -1)
+
     # check if there are lost tasks
     diff_list = compare_lists(task_list, completedQueue)
     if diff_list:
@@ -221,12 +472,32 @@ def greedy_compression_algorithm(task_list, total_bandwidth):
     return list(completedQueue)
 
 
-def preemptive_scheduling_algorithm(task_list, total_bandwidth):
+def preemptive_scheduling_algorithm(task_list, total_bandwidth, checkpoint_file=None, checkpoint_interval=0,
+                                    resume=False, batch_admission=False, aging=None, timeline_dir=None,
+                                    arrival_index=None, state=None, stop_time=None):
     """
     Execute tasks using a preemptive scheduling algorithm.
     :param task_list: List of tasks to execute
     :param total_bandwidth: Total available bandwidth
-    :return: List of completed tasks
+    :param checkpoint_file: binary file to snapshot the simulation state into, default no checkpoints
+    :param checkpoint_interval: snapshot the state every N events (scheduler loop iterations), 0 disables snapshots
+    :param resume: continue from checkpoint_file if it exists, task_list and total_bandwidth are then ignored. The
+        checkpoint must be of a run with the same batch_admission and aging, else CheckpointPolicyException is raised
+    :param batch_admission: pack the tasks of every time slice before admitting them, see pack_time_slice
+    :param aging: dictionary of TaskPriority -> effective priority gained per waiting time unit, default no aging.
+        With aging, the effective priority of a waiting task is its priority + int(rate * (time - created time)),
+        one level more every 1 / rate time units without limit, and every time slice is admitted in effective
+        priority order (a time-shifted sort key; ties keep the priority order). A task may preempt running tasks of
+        lower priority and of a lower effective priority than its own, a running task keeping the effective
+        priority it started with. Rates too small to gain a level within the run give the policy without aging.
+    :param timeline_dir: also keep every snapshot in this directory, named by event number (see
+        checkpoint.timeline_path), so task edits can be re-scheduled from the last unaffected snapshot
+    :param arrival_index: ArrivalIndex of task_list shared between runs (see arrival_index.py), its time slices are
+        already grouped and sorted by priority
+    :param state: SchedulerState to continue a stopped run from, task_list and total_bandwidth are then ignored, its
+        policy is checked as the one of a checkpoint
+    :param stop_time: stop before processing the first time slice at or after stop_time, see simple_greedy_algorithm
+    :return: List of completed tasks, or the SchedulerState reached with stop_time
     """
 
     def group_tasks_by_time():
@@ -241,6 +512,8 @@ def preemptive_scheduling_algorithm(task_list, total_bandwidth):
         start_time = one_task.actual_start_time
         if start_time not in waitingTaskQueue:
             waitingTaskQueue[start_time] = deque()
+        elif waitingTaskQueue[start_time] and waitingTaskQueue[start_time][-1].priority < one_task.priority:
+            unsortedTimes.add(start_time)  # Appended out of priority order, sort the time slice before admission
         waitingTaskQueue[start_time].append(one_task)
 
     def add_task_to_processing_queue(new_task):
@@ -264,19 +537,28 @@ def preemptive_scheduling_algorithm(task_list, total_bandwidth):
             DEBUG_HALT()
         return task_to_remove
 
+    def effective_priority(one_task, at_time):
+        """Priority of a task raised by one level per 1 / rate time units it waited by at_time, see aging."""
+        if aging is None:
+            return one_task.priority
+        return one_task.priority + int(aging.get(one_task.priority, 0) * (at_time - one_task.created_time))
+
     def preempt_tasks_in_processing_queue(new_task):
         """
         Preempt tasks in the processing queue if necessary to make room for a new task.
         Tasks are preempted based on their priority and remaining duration.
         """
         nonlocal processingQueue, waitingTaskQueue, total_bandwidth, current_time
+        new_priority = effective_priority(new_task, current_time)
         preemptedTempQueue = deque()
         # Sort tasks by priority and remaining duration for preemption
         processingQueue = sort_list(processingQueue, 'priority', is_reverse=False)
         processingQueue = sort_list(processingQueue, 'remaining_duration', is_reverse=True)
         new_task_added = False
         for one_task in processingQueue:
-            if one_task.priority < new_task.priority:
+            # A running task keeps the effective priority it started with
+            if one_task.priority < new_task.priority and \
+                    effective_priority(one_task, one_task.actual_start_time) < new_priority:
                 remove_task_from_processing_queue(one_task)
                 preemptedTempQueue.append(one_task)
                 if new_task.bandwidth <= total_bandwidth:
@@ -299,14 +581,60 @@ def preemptive_scheduling_algorithm(task_list, total_bandwidth):
         remove_task_from_processing_queue(one_task)
         completedQueue.append(one_task)
 
-    waitingTaskQueue = {}  # Initialize waiting queue grouped by start time
-    group_tasks_by_time()
-    processingQueue = []  # Initialize processing queue
-    completedQueue = []  # Initialize completed tasks queue
-    orig_bandwidth = total_bandwidth  # Store original bandwidth
-    current_time = 0
+    if aging is not None and not any(aging.values()):
+        aging = None  # No tier ages
+    policy = scheduler_policy(batch_admission, aging)
+    unsortedTimes = set()  # Time slices whose tasks are not in priority order
+    completedSaved = {}  # Completed log file -> number of completed tasks it holds, see save_checkpoint
+    if resume and checkpoint_file and os.path.exists(checkpoint_file):
+        state = load_checkpoint(checkpoint_file)  # Restore the simulation state from the latest checkpoint
+    if state is not None:
+        if state.policy is not None and state.policy != policy:
+            raise CheckpointPolicyException(state.policy, policy)
+        waitingTaskQueue = state.waiting_queue
+        unsortedTimes.update(waitingTaskQueue)  # The order of restored time slices is not known
+        processingQueue = state.processing_queue
+        completedQueue = state.completed_queue
+        orig_bandwidth = state.orig_bandwidth
+        total_bandwidth = state.total_bandwidth
+        current_time = state.current_time
+        max_processed_time = state.max_processed_time
+        events_num = state.events_num
+        if checkpoint_file:
+            completedSaved[completed_log_path(checkpoint_file)] = len(completedQueue)
+        if timeline_dir:
+            completedSaved[timeline_completed_log(timeline_dir)] = len(completedQueue)
+        task_list = state_tasks(state)
+    else:
+        if arrival_index is not None:
+            waitingTaskQueue = arrival_index.waiting_queue(task_list)  # Time slices already in priority order
+        else:
+            waitingTaskQueue = {}  # Initialize waiting queue grouped by start time
+            group_tasks_by_time()
+        processingQueue = []  # Initialize processing queue
+        completedQueue = []  # Initialize completed tasks queue
+        orig_bandwidth = total_bandwidth  # Store original bandwidth
+        current_time = 0
+        max_processed_time = -1  # Latest time slice popped from the waiting queue
+        events_num = 0
 
     while waitingTaskQueue or processingQueue:
+        if stop_time is not None and not any(one_time < stop_time for one_time in waitingTaskQueue):
+            break  # The next time slice is at or after stop_time
+
+        # Snapshot the state every checkpoint_interval events
+        if (checkpoint_file or timeline_dir) and checkpoint_interval and events_num and \
+                events_num % checkpoint_interval == 0:
+            snapshot_files = [(checkpoint_file, completed_log_path(checkpoint_file))] if checkpoint_file else []
+            if timeline_dir:
+                snapshot_files.append((timeline_path(timeline_dir, events_num), timeline_completed_log(timeline_dir)))
+            for snapshot_file, completed_log in snapshot_files:
+                completedSaved[completed_log] = save_checkpoint(
+                    snapshot_file, waitingTaskQueue, processingQueue, completedQueue, current_time, total_bandwidth,
+                    orig_bandwidth, max_processed_time, events_num, policy, completed_log,
+                    completedSaved.get(completed_log, 0))
+        events_num += 1
+
         # Remove tasks that are done from the processing queue
         for one_task in processingQueue:
             # Decrease remaining duration for tasks in progress
@@ -318,7 +646,18 @@ def preemptive_scheduling_algorithm(task_list, total_bandwidth):
         try:
             current_time = sorted(waitingTaskQueue.keys())[0]
             one_queue = waitingTaskQueue.pop(current_time)  # Pop the processed time slice from the waiting queue
-            one_queue = deque(sort_list(one_queue, 'priority', is_reverse=True))
+            max_processed_time = max(max_processed_time, current_time)
+            if aging is not None:
+                # A stable sort by the effective priority now (ties: the higher priority), so a task that waited
+                # long enough is admitted before newer tasks of higher priority
+                unsortedTimes.discard(current_time)
+                one_queue = deque(sorted(one_queue, key=lambda one_task: (effective_priority(one_task, current_time),
+                                                                          one_task.priority), reverse=True))
+            elif current_time in unsortedTimes:  # A stable sort leaves a time slice in priority order as it is
+                unsortedTimes.discard(current_time)
+                one_queue = deque(sort_list(one_queue, 'priority', is_reverse=True))
+            if batch_admission:
+                one_queue = pack_time_slice(one_queue, total_bandwidth)
             while one_queue:
                 one_task = one_queue.popleft()
                 if one_task.bandwidth <= total_bandwidth:
@@ -332,9 +671,271 @@ def preemptive_scheduling_algorithm(task_list, total_bandwidth):
             current_time += 1  # advance current time
             continue  # No tasks at the current time, move forward
 
+    if stop_time is not None:
+        return SchedulerState(waitingTaskQueue, processingQueue, completedQueue, current_time, total_bandwidth,
+                              orig_bandwidth, max_processed_time, events_num, policy)
+
     # check if there are lost tasks
     diff_list = compare_lists(task_list, completedQueue)
     if diff_list:
         DEBUG_HALT()
 
     return list(completedQueue)
+
+
+def proportional_compression_algorithm(task_list, total_bandwidth):
+    """
+    Execute tasks using a greedy algorithm with proportional compression.
+    Instead of dropping running tasks straight to their minimal bandwidth, the missing bandwidth is cut from all
+    running tasks in proportion to their (original - minimal) headroom (water-filling), so every task is compressed
+    only as much as needed. Compressed tasks keep their work (bandwidth * duration), so their duration is stretched,
+    and they are decompressed as soon as bandwidth is freed. A running task is never compressed below 1, so it
+    always makes progress. Every bandwidth change is recorded on its task, a completed task only holds its last
+    bandwidth (see Task.bandwidth_segments).
+    :param task_list: List of tasks to execute
+    :param total_bandwidth: Total available bandwidth
+    :return: List of completed tasks
+    """
+    def group_tasks_by_time():
+        """Group tasks by their start time and add them to the waiting queue."""
+        nonlocal task_list
+        for one_task in task_list:
+            add_task_to_waiting_queue(one_task)
+
+    def add_task_to_waiting_queue(one_task):
+        """Add a task to the waiting queue at its start time."""
+        nonlocal waitingTaskQueue
+        start_time = one_task.actual_start_time
+        if start_time not in waitingTaskQueue:
+            waitingTaskQueue[start_time] = deque()
+        waitingTaskQueue[start_time].append(one_task)
+
+    def min_allowed_bandwidth(one_task):
+        """Minimal bandwidth a running task may be compressed to."""
+        return min(max(one_task.min_bandwidth, 1), one_task.original_bandwidth)
+
+    def compression_headroom(one_task):
+        """Bandwidth that can be taken from a running task."""
+        return one_task.original_bandwidth - min_allowed_bandwidth(one_task)
+
+    def advance_work(to_time):
+        """Deduct the work done by running tasks since the last update."""
+        nonlocal last_update_time
+        for one_task in processingQueue:
+            remaining_work[one_task] -= one_task.bandwidth * (to_time - last_update_time)
+        last_update_time = to_time
+
+    def rebalance():
+        """
+        Re-allocate bandwidth among running tasks: the bandwidth missing for all tasks to run uncompressed is cut
+        from every task in proportion to its headroom, leftover units go to the largest remainders.
+        """
+        nonlocal total_bandwidth
+        excess = running_original_bandwidth - orig_bandwidth
+        headroom = running_headroom
+        cuts = {one_task: 0 for one_task in processingQueue}
+        if excess > 0:
+            if excess > headroom:  # Admission makes sure the excess can always be cut
+                DEBUG_HALT()
+            remainders = []
+            for one_task in processingQueue:
+                cut, remainder = divmod(excess * task_headroom[one_task], headroom)
+                cuts[one_task] = cut
+                remainders.append((remainder, one_task.id, one_task))
+            leftover = excess - sum(cuts.values())
+            for remainder, task_id, one_task in sorted(remainders, key=lambda x: (-x[0], x[1]))[:leftover]:
+                cuts[one_task] += 1
+        for one_task in processingQueue:
+            new_bandwidth = one_task.original_bandwidth - cuts[one_task]
+            if new_bandwidth != one_task.bandwidth:
+                one_task.change_bandwidth(new_bandwidth, current_time)
+                # Stretch (or shrink back) the duration so the remaining work is preserved
+                one_task.actual_end_time = current_time + max(0, -(-remaining_work[one_task] // new_bandwidth))
+                one_task.remaining_duration = one_task.actual_end_time - current_time
+        total_bandwidth = orig_bandwidth - sum(one_task.bandwidth for one_task in processingQueue)
+        if total_bandwidth < 0 or total_bandwidth > orig_bandwidth:  # Bandwidth must stay within the link
+            DEBUG_HALT()
+
+    def try_add_task_to_processing_queue(new_task):
+        """Add a task to the processing queue if the running tasks can be compressed enough to fit it."""
+        nonlocal processingQueue, running_original_bandwidth, running_headroom
+        needed = running_original_bandwidth + new_task.original_bandwidth
+        if needed - orig_bandwidth > running_headroom + task_headroom[new_task]:
+            return False
+        running_original_bandwidth = needed
+        running_headroom += task_headroom[new_task]
+        new_task.status = TaskStatus.IN_PROGRESS
+        remaining_work[new_task] = new_task.original_bandwidth * new_task.total_duration
+        processingQueue.append(new_task)
+        rebalance()
+        return True
+
+    def finish_task(one_task):
+        """Finish a task and move it to the completed queue."""
+        nonlocal completedQueue, running_original_bandwidth, running_headroom
+        one_task.status = TaskStatus.FINISHED
+        processingQueue.remove(one_task)
+        del remaining_work[one_task]
+        running_original_bandwidth -= one_task.original_bandwidth
+        running_headroom -= task_headroom[one_task]
+        completedQueue.append(one_task)
+
+    waitingTaskQueue = {}  # Initialize waiting queue grouped by start time
+    group_tasks_by_time()
+    task_headroom = {one_task: compression_headroom(one_task) for one_task in task_list}
+    processingQueue = []  # Initialize processing queue
+    completedQueue = []  # Initialize completed tasks queue
+    remaining_work = {}  # Remaining work (bandwidth * time units) of running tasks
+    running_original_bandwidth = 0  # Bandwidth running tasks need uncompressed
+    running_headroom = 0  # Bandwidth that can be taken from running tasks by compression
+    orig_bandwidth = total_bandwidth  # Store original bandwidth
+    current_time = 0
+    last_update_time = 0
+
+    while waitingTaskQueue or processingQueue:  # run while there are tasks in waiting or operation
+        # Advance to the next event: a task arrival or the end of a running task
+        event_times = [one_task.actual_end_time + 1 for one_task in processingQueue]
+        if waitingTaskQueue:
+            event_times.append(min(waitingTaskQueue.keys()))
+        current_time = min(event_times)
+        advance_work(current_time)
+
+        # Remove tasks that are done and give their bandwidth back to the compressed tasks
+        done_tasks = [one_task for one_task in processingQueue if one_task.actual_end_time < current_time]
+        for one_task in done_tasks:
+            finish_task(one_task)
+        if done_tasks:
+            rebalance()
+
+        # Process tasks at the current time
+        one_queue = waitingTaskQueue.pop(current_time, deque())
+        one_queue = deque(sort_list(one_queue, 'priority', is_reverse=True))
+        while one_queue:
+            one_task = one_queue.popleft()
+            if not try_add_task_to_processing_queue(one_task):
+                one_task.actual_start_time += 1  # advance start time and retry in the next time unit
+                add_task_to_waiting_queue(one_task)
+
+    # check if there are lost tasks
+    diff_list = compare_lists(task_list, completedQueue)
+    if diff_list:
+        DEBUG_HALT()
+
+    return list(completedQueue)
+
+
+def easy_backfilling_algorithm(task_list, total_bandwidth):
+    """
+    Execute tasks using EASY backfilling.
+    Waiting tasks are served by priority, then by created time. When the head of the queue does not fit, it gets a
+    reservation at the earliest time the running tasks leave enough bandwidth for it, and later tasks are started
+    ahead of it only if they fit now without delaying that reservation. Free bandwidth over time is kept in a
+    CapacityProfile, so reservation and fit checks are logarithmic in the timeline length.
+    :param task_list: List of tasks to execute
+    :param total_bandwidth: Total available bandwidth
+    :return: List of completed tasks
+    """
+    def group_tasks_by_time():
+        """Group tasks by their start time and add them to the waiting queue."""
+        nonlocal task_list
+        for one_task in task_list:
+            add_task_to_waiting_queue(one_task)
+
+    def add_task_to_waiting_queue(one_task):
+        """Add a task to the waiting queue at its start time."""
+        nonlocal waitingTaskQueue
+        start_time = one_task.actual_start_time
+        if start_time not in waitingTaskQueue:
+            waitingTaskQueue[start_time] = deque()
+        waitingTaskQueue[start_time].append(one_task)
+
+    def add_task_to_ready_queue(one_task):
+        """Add an arrived task to the ready queue, ordered by priority and created time."""
+        insort(readyQueue, (-one_task.priority, one_task.created_time, one_task.id, one_task))
+
+    def fits_now(one_task):
+        """Check if the task can run from the current time to its end."""
+        return profile.min_free(current_time, current_time + one_task.total_duration + 1) >= one_task.bandwidth
+
+    def add_task_to_processing_queue(new_task):
+        """Start a task now and reserve its bandwidth until its end time."""
+        new_task.actual_start_time = current_time
+        new_task.status = TaskStatus.IN_PROGRESS
+        profile.reserve(current_time, new_task.actual_end_time + 1, new_task.bandwidth)
+        heappush(processingQueue, (new_task.actual_end_time + 1, new_task.id, new_task))
+
+    def finish_task(one_task):
+        """Finish a task and move it to the completed queue."""
+        nonlocal completedQueue
+        one_task.status = TaskStatus.FINISHED
+        completedQueue.append(one_task)
+
+    def schedule_ready_tasks():
+        """Start ready tasks in order, then backfill around the reservation of the blocked head task."""
+        nonlocal readyQueue
+        while readyQueue and fits_now(readyQueue[0][-1]):
+            add_task_to_processing_queue(readyQueue.pop(0)[-1])
+        if not readyQueue:
+            return
+        head_task = readyQueue[0][-1]
+        shadow_time = profile.earliest_start(head_task.bandwidth, head_task.total_duration + 1, current_time)
+        if shadow_time is None:  # Task can never fit the link
+            DEBUG_HALT()
+        shadow_end = shadow_time + head_task.total_duration + 1
+        still_waiting = [readyQueue[0]]
+        for entry in readyQueue[1:]:
+            one_task = entry[-1]
+            if fits_now(one_task):
+                task_end = current_time + one_task.total_duration + 1
+                profile.reserve(current_time, task_end, one_task.bandwidth)
+                head_delayed = profile.min_free(shadow_time, shadow_end) < head_task.bandwidth
+                profile.release(current_time, task_end, one_task.bandwidth)
+                if not head_delayed:
+                    add_task_to_processing_queue(one_task)
+                    continue
+            still_waiting.append(entry)
+        readyQueue = still_waiting
+
+    waitingTaskQueue = {}  # Initialize waiting queue grouped by start time
+    group_tasks_by_time()
+    readyQueue = []  # Arrived tasks waiting to start, sorted by priority and created time
+    processingQueue = []  # Heap of running tasks by the time their bandwidth is freed
+    completedQueue = []  # Initialize completed tasks queue
+    profile = CapacityProfile(total_bandwidth)
+    current_time = 0
+
+    while waitingTaskQueue or readyQueue or processingQueue:
+        # Advance to the next event: a task arrival or the end of a running task
+        event_times = []
+        if waitingTaskQueue:
+            event_times.append(min(waitingTaskQueue.keys()))
+        if processingQueue:
+            event_times.append(processingQueue[0][0])
+        current_time = min(event_times)
+
+        # Remove tasks that are done from the processing queue
+        while processingQueue and processingQueue[0][0] <= current_time:
+            finish_task(heappop(processingQueue)[-1])
+
+        # Move tasks arriving now to the ready queue and start what can be started
+        for one_task in waitingTaskQueue.pop(current_time, deque()):
+            add_task_to_ready_queue(one_task)
+        schedule_ready_tasks()
+
+    # check if there are lost tasks
+    diff_list = compare_lists(task_list, completedQueue)
+    if diff_list:
+        DEBUG_HALT()
+
+    return list(completedQueue)
+
+
+# Algorithms that take TaskArrays as they are, without writing to them
+COLUMNAR_ALGORITHMS = (simple_greedy_algorithm,)
+# Algorithms that take a shared ArrivalIndex
+INDEXED_ALGORITHMS = (simple_greedy_algorithm, greedy_compression_algorithm, preemptive_scheduling_algorithm)
+# Algorithms that can stop before a time and continue from the state they stopped in (stop_time and state arguments)
+RESUMABLE_ALGORITHMS = (simple_greedy_algorithm, greedy_compression_algorithm, preemptive_scheduling_algorithm)
+# Algorithms that can start an arriving task with less than its bandwidth, down to its minimal bandwidth. The
+# others hold a task until its whole bandwidth is free, so a link narrower than a task never finishes the list.
+COMPRESSING_ALGORITHMS = (proportional_compression_algorithm,)
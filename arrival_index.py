@@ -0,0 +1,75 @@
+"""
+Shared arrival stream of a task list.
+The time slice schedulers group the tasks by arrival time and sort every time slice by priority. ArrivalIndex does
+both once per task list, with array operations, so any number of policy runs over the same list can build their
+waiting queues from it: every time slice comes out already in admission order.
+"""
+from collections import deque
+
+import numpy as np
+
+from utils import is_columnar
+
+
+class ArrivalIndexException(Exception):
+    def __init__(self, reason):
+        super().__init__("Arrival index does not match the task list: {}".format(reason))
+
+
+class ArrivalIndex:
+    def __init__(self, task_arrays):
+        """
+        :param task_arrays: TaskArrays (or LazyTaskList) of the task list, in task list order
+        """
+        task_arrays = task_arrays.arrays
+        arrival_times = task_arrays.actual_start_time
+        # Stable: inside a time slice, the highest priority first, then task list order
+        order = np.lexsort((-task_arrays.priority, arrival_times))
+        sorted_times = arrival_times[order]
+        times, first_positions = np.unique(sorted_times, return_index=True)
+        self.ids = task_arrays.id.tolist()
+        self.order = order.tolist()  # Task list positions in admission order
+        self.times = times.tolist()  # Arrival times, ascending
+        self.offsets = first_positions.tolist() + [len(order)]  # Time slice k is order[offsets[k]:offsets[k + 1]]
+
+    @classmethod
+    def from_arrays(cls, ids, order, times, offsets):
+        """
+        Create an index from the attributes of an index built before (e.g. stored in a task list sidecar index,
+        see task_gen.load_task_list_index), without sorting again.
+        """
+        new_index = cls.__new__(cls)
+        new_index.ids = np.asarray(ids, dtype=np.int64).tolist()
+        new_index.order = np.asarray(order, dtype=np.int64).tolist()
+        new_index.times = np.asarray(times, dtype=np.int64).tolist()
+        new_index.offsets = np.asarray(offsets, dtype=np.int64).tolist()
+        return new_index
+
+    @classmethod
+    def from_tasks(cls, task_list):
+        """
+        Build the index of a list of Task objects or TaskArrays.
+        """
+        from task_arrays import TaskArrays
+
+        return cls(task_list if is_columnar(task_list) else TaskArrays.from_tasks(task_list))
+
+    def __len__(self):
+        return len(self.order)
+
+    def waiting_queue(self, task_list):
+        """
+        Group the tasks of a run by arrival time.
+        :param task_list: list of the Task objects of one run, in the order the index was built from
+        :return: dictionary of arrival time -> deque of tasks, sorted by priority (highest first)
+        """
+        if len(task_list) != len(self.order):
+            raise ArrivalIndexException("{} tasks, the index has {}".format(len(task_list), len(self.order)))
+        for position, (one_task, task_id) in enumerate(zip(task_list, self.ids)):
+            if one_task.id != task_id:
+                raise ArrivalIndexException("task {} at position {}, expected {}".format(one_task.id, position,
+                                                                                         task_id))
+        order = self.order
+        offsets = self.offsets
+        return {one_time: deque(task_list[i] for i in order[offsets[k]:offsets[k + 1]])
+                for k, one_time in enumerate(self.times)}
@@ -0,0 +1,282 @@
+"""
+Run time benchmarks of the scheduling algorithms on the generated task lists.
+Every run starts from a freshly loaded task list, since the algorithms change the tasks they schedule.
+Heavy modules are imported where they are used, so the startup benchmark of spawned workers, which import this
+module, is not skewed by it.
+"""
+import multiprocessing as mps
+import subprocess
+import sys
+import time
+from functools import partial
+
+from algo_tester import AlgoTester, compare_policies, comparison_str
+from algorithms import greedy_compression_algorithm, preemptive_scheduling_algorithm, simple_greedy_algorithm
+from task import TaskPriority
+
+TASK_LISTS = {"Random": "task_list_random.json",
+              "A": "task_list_a.json",
+              "B": "task_list_b.json",
+              "C": "task_list_c.json"}
+
+# Effective priority gained per waiting time unit: every task gains a level per 2000 time units of waiting
+DEFAULT_AGING = {TaskPriority.REGULAR: 0.0005, TaskPriority.PREMIUM: 0.0005, TaskPriority.ENTERPRISE: 0.0005}
+
+def time_algorithm(algo_fp, task_list_file, total_bandwidth, repeat=1):
+    """
+    Run an algorithm on a task list and measure its run time.
+    :param algo_fp: algorithm function pointer
+    :param task_list_file: JSON task list
+    :param total_bandwidth: total available bandwidth
+    :param repeat: number of runs, the fastest one is reported
+    :return: tuple of (run time in seconds, AlgoTester holding the results of the last run)
+    """
+    best_time = None
+    tester = None
+    for _ in range(repeat):
+        tester = AlgoTester(task_list_file, total_bandwidth)
+        start = time.perf_counter()
+        tester.test(algo_fp)
+        run_time = time.perf_counter() - start
+        if best_time is None or run_time < best_time:
+            best_time = run_time
+    return best_time, tester
+
+
+def overhead_str(base_time, run_time):
+    """relative run time change in percent"""
+    return "{:+.1f}%".format(100 * (run_time - base_time) / base_time)
+
+
+def tail_scores_str(tester):
+    """average, 95th percentile and worst score of every priority tier"""
+    ret = []
+    for one_prio in TaskPriority:
+        scores = sorted(one_task.score for one_task in tester.completed_tasks if one_task.priority == one_prio)
+        if scores:
+            ret.append("{}: {}/{}/{}".format(one_prio.name, sum(scores) // len(scores),
+                                             scores[len(scores) * 95 // 100], scores[-1]))
+    return ", ".join(ret)
+
+
+def benchmark_aging(task_lists=None, total_bandwidth=50, aging=None, repeat=1):
+    """
+    Compare the preemptive scheduler with and without priority aging. Scores are printed as average/95th
+    percentile/worst per priority tier.
+    :param task_lists: dictionary of task list name -> JSON task list, default all generated task lists
+    :param total_bandwidth: total available bandwidth
+    :param aging: aging rates per TaskPriority, default DEFAULT_AGING
+    :param repeat: number of runs per measurement
+    """
+    task_lists = task_lists or TASK_LISTS
+    aging_algorithm = partial(preemptive_scheduling_algorithm, aging=aging or DEFAULT_AGING)
+    print("Preemptive scheduling, priority aging overhead and tail scores")
+    for list_name, task_list_file in task_lists.items():
+        base_time, base_tester = time_algorithm(preemptive_scheduling_algorithm, task_list_file, total_bandwidth,
+                                                repeat)
+        aging_time, aging_tester = time_algorithm(aging_algorithm, task_list_file, total_bandwidth, repeat)
+        print("Task List \"{}\": no aging {:.2f}s, aging {:.2f}s ({})".format(
+            list_name, base_time, aging_time, overhead_str(base_time, aging_time)))
+        print("    no aging: {}, end time {}".format(tail_scores_str(base_tester), base_tester.time_end))
+        print("    aging:    {}, end time {}".format(tail_scores_str(aging_tester), aging_tester.time_end))
+
+
+def admission_str(tester, total_bandwidth):
+    """deferred tasks, total waiting time, bandwidth utilization and average scores of a tested algorithm"""
+    tasks = tester.completed_tasks
+    waits = [one_task.actual_start_time - one_task.created_time for one_task in tasks]
+    # work at the requested bandwidths per bandwidth-time of the run
+    work = sum(one_task.original_bandwidth * one_task.total_duration for one_task in tasks)
+    utilization = work / (total_bandwidth * (tester.time_end - tester.time_start))
+    return "deferred {}, total wait {}, utilization {:.3f}, end time {}, averages {}".format(
+        sum(1 for wait in waits if wait), sum(waits), utilization, tester.time_end,
+        " ".join("{}:{}".format(one_prio, scores[2]) for one_prio, scores in tester.scores_dict.items()))
+
+
+def benchmark_batch_admission(task_lists=None, total_bandwidth=50):
+    """
+    Compare first-fit admission with batch admission (pack_time_slice) for every algorithm that supports it.
+    Batch admission lowers the total wait, but it can raise the average score of a tier, which is printed as a
+    regression. Greedy compression raises the ENTERPRISE average: lower-tier tasks packed ahead of an ENTERPRISE task
+    take the free bandwidth, so the ENTERPRISE task has to compress running tasks to be admitted, and is deferred
+    when that is not enough.
+    :param task_lists: dictionary of task list name -> JSON task list, default all generated task lists
+    :param total_bandwidth: total available bandwidth
+    """
+    task_lists = task_lists or TASK_LISTS
+    algo_functions = [(simple_greedy_algorithm, "Simple greedy"),
+                      (greedy_compression_algorithm, "Greedy compression"),
+                      (preemptive_scheduling_algorithm, "Preemptive")]
+    print("Batch admission vs. first-fit")
+    for list_name, task_list_file in task_lists.items():
+        print("Task List \"{}\":".format(list_name))
+        for algo_fp, algo_name in algo_functions:
+            first_fit_time, first_fit_tester = time_algorithm(algo_fp, task_list_file, total_bandwidth)
+            batch_time, batch_tester = time_algorithm(partial(algo_fp, batch_admission=True), task_list_file,
+                                                      total_bandwidth)
+            print("    {}: first-fit {:.2f}s, batch admission {:.2f}s ({})".format(
+                algo_name, first_fit_time, batch_time, overhead_str(first_fit_time, batch_time)))
+            print("        first-fit: {}".format(admission_str(first_fit_tester, total_bandwidth)))
+            print("        batch:     {}".format(admission_str(batch_tester, total_bandwidth)))
+            for one_prio, scores in batch_tester.scores_dict.items():
+                first_fit_avg = first_fit_tester.scores_dict[one_prio][2]
+                if isinstance(scores[2], int) and isinstance(first_fit_avg, int) and scores[2] > first_fit_avg:
+                    print("        regression: batch admission raises the {} average {} -> {}".format(
+                        one_prio, first_fit_avg, scores[2]))
+
+
+def benchmark_simple_greedy_arrays(task_lists=None, total_bandwidth=50, repeat=1):
+    """
+    Compare the simple greedy algorithm on Task objects with its columnar fast path on TaskArrays.
+    :param task_lists: dictionary of task list name -> JSON task list, default all generated task lists
+    :param total_bandwidth: total available bandwidth
+    :param repeat: number of runs per measurement
+    """
+    from task_arrays import TaskArrays
+
+    task_lists = task_lists or TASK_LISTS
+    print("Simple greedy, columnar fast path")
+    for list_name, task_list_file in task_lists.items():
+        object_time, object_tester = time_algorithm(simple_greedy_algorithm, task_list_file, total_bandwidth, repeat)
+        task_arrays = TaskArrays.from_json_file(task_list_file)
+        arrays_time = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            completed = simple_greedy_algorithm(task_arrays, total_bandwidth)
+            run_time = time.perf_counter() - start
+            if arrays_time is None or run_time < arrays_time:
+                arrays_time = run_time
+        object_starts = {one_task.id: one_task.actual_start_time for one_task in object_tester.completed_tasks}
+        same_starts = object_starts == dict(zip(completed.id.tolist(), completed.actual_start_time.tolist()))
+        print("Task List \"{}\": objects {:.3f}s, arrays {:.3f}s ({:.1f}x), same start times: {}".format(
+            list_name, object_time, arrays_time, object_time / arrays_time, same_starts))
+
+
+def benchmark_compare_policies(task_lists=None, total_bandwidth=50):
+    """
+    Compare testing the simple greedy, greedy compression and preemptive algorithms one by one, each on a freshly
+    loaded task list, with compare_policies on one loaded list and a shared arrival index.
+    :param task_lists: dictionary of task list name -> JSON task list, default all generated task lists
+    :param total_bandwidth: total available bandwidth
+    """
+    from task_arrays import TaskArrays
+
+    task_lists = task_lists or TASK_LISTS
+    algo_functions = [(simple_greedy_algorithm, "Simple greedy"),
+                      (greedy_compression_algorithm, "Greedy compression"),
+                      (preemptive_scheduling_algorithm, "Preemptive")]
+    print("Policy comparison, separate runs vs. shared arrival stream")
+    for list_name, task_list_file in task_lists.items():
+        separate_times = []
+        separate_scores = {}
+        for algo_fp, algo_name in algo_functions:
+            start = time.process_time()
+            tester = AlgoTester(task_list_file, total_bandwidth)
+            tester.test(algo_fp)
+            separate_times.append(time.process_time() - start)
+            separate_scores[algo_name] = tester.scores_dict
+        start = time.process_time()
+        shared_scores = compare_policies(TaskArrays.from_json_file(task_list_file), algo_functions, total_bandwidth)
+        shared_time = time.process_time() - start
+        print("Task List \"{}\": separate {:.2f}s CPU (slowest run {:.2f}s), shared {:.2f}s CPU ({:.2f}x the slowest "
+              "run), same scores: {}".format(list_name, sum(separate_times), max(separate_times), shared_time,
+                                             shared_time / max(separate_times), shared_scores == separate_scores))
+        print(comparison_str(shared_scores))
+
+
+def benchmark_run_copy(task_lists=None, total_bandwidth=50, repeat=5):
+    """
+    Measure the per run copy of the shared task specs: the algorithms without a columnar fast path change the Task
+    objects they schedule, so AlgoTester.run_algorithm builds new ones from the frozen arrays for every run.
+    :param task_lists: dictionary of task list name -> JSON task list, default all generated task lists
+    :param total_bandwidth: total available bandwidth
+    :param repeat: number of copies timed, the fastest one is reported
+    """
+    from task_arrays import TaskArrays
+
+    task_lists = task_lists or TASK_LISTS
+    print("Per run copy of the task specs (Task objects built from the frozen arrays)")
+    for list_name, task_list_file in task_lists.items():
+        task_specs = TaskArrays.from_json_file(task_list_file).frozen()
+        copy_time = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            task_specs.to_tasks()
+            run_time = time.perf_counter() - start
+            if copy_time is None or run_time < copy_time:
+                copy_time = run_time
+        run_times = []
+        for algo_fp in (greedy_compression_algorithm, preemptive_scheduling_algorithm):
+            tester = AlgoTester.from_task_list(task_specs, total_bandwidth)
+            start = time.perf_counter()
+            tester.test(algo_fp)
+            run_times.append(time.perf_counter() - start)
+        print("Task List \"{}\": copy {:.2f}ms, {:.1f}% of a greedy compression run, {:.1f}% of a preemptive "
+              "run".format(list_name, 1000 * copy_time, 100 * copy_time / run_times[0],
+                           100 * copy_time / run_times[1]))
+
+def time_import(module_name, repeat=3):
+    """
+    Measure the startup time of a fresh interpreter importing a module, as paid by the CLI.
+    :return: tuple of (fastest wall time in seconds, names of the heavy modules the import loaded)
+    """
+    code = ("import sys, {}; print(','.join(name for name in ('numpy', 'matplotlib', 'seaborn') "
+            "if name in sys.modules))".format(module_name))
+    best_time = None
+    loaded = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        run_time = time.perf_counter() - start
+        if best_time is None or run_time < best_time:
+            best_time = run_time
+    return best_time, loaded.strip().split(",") if loaded.strip() else []
+
+
+def _import_worker(module_name):
+    """worker: import a module the way a freshly spawned algo_worker process does"""
+    __import__(module_name)
+
+
+def time_worker_spawn(module_name="algo_tester", workers_num=8):
+    """
+    Measure the time to start workers with the spawn method (the default on Windows and macOS), each importing the
+    module, and wait for all of them to exit.
+    :return: wall time in seconds
+    """
+    ctx = mps.get_context("spawn")
+    start = time.perf_counter()
+    procs = [ctx.Process(target=_import_worker, args=(module_name,)) for _ in range(workers_num)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    return time.perf_counter() - start
+
+
+def benchmark_startup(workers_num=8):
+    """
+    Print the startup time of the CLI modules and of spawning workers.
+    """
+    print("Startup time")
+    base_time, _ = time_import("sys")
+    print("Python interpreter: {:.3f}s".format(base_time))
+    for module_name in ("algorithms", "algo_tester", "multi_link"):
+        run_time, loaded = time_import(module_name)
+        print("import {}: {:.3f}s, heavy modules loaded: {}".format(module_name, run_time,
+                                                                   ", ".join(loaded) or "none"))
+    print("Spawn {} workers importing algo_tester: {:.3f}s".format(workers_num, time_worker_spawn(
+        "algo_tester", workers_num)))
+
+
+def main():
+    benchmark_startup()
+    benchmark_aging()
+    benchmark_batch_admission()
+    benchmark_simple_greedy_arrays()
+    benchmark_compare_policies()
+    benchmark_run_copy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Free bandwidth of a link over time.
+The profile keeps one slot per time unit in a segment tree with lazy range add, holding the minimum and maximum free
+bandwidth of every node. Reserving or releasing bandwidth over a time range, asking how much bandwidth is free across
+a time range and asking for the earliest time with enough free bandwidth are O(log T), T being the horizon of the
+profile, which grows on demand.
+The profile is shared by the schedulers that plan ahead and by AlgoTester.create_task_matrix.
+"""
+
+
+class CapacityProfile:
+    def __init__(self, capacity, horizon=1024):
+        """
+        :param capacity: total bandwidth of the link, free at every time slot until reserved
+        :param horizon: initial number of time slots, the profile grows when reservations go beyond it
+        """
+        self.capacity = capacity
+        self.__size = 1
+        while self.__size < horizon:
+            self.__size *= 2
+        self.__min = [capacity] * (2 * self.__size)
+        self.__max = [capacity] * (2 * self.__size)
+        self.__lazy = [0] * (2 * self.__size)
+
+    @property
+    def horizon(self):
+        return self.__size
+
+    def __grow(self, end):
+        """double the number of time slots until end fits, unreserved new slots are fully free"""
+        leaves = [self.free_at(t) for t in range(self.__size)]
+        while self.__size < end:
+            self.__size *= 2
+        leaves += [self.capacity] * (self.__size - len(leaves))
+        self.__lazy = [0] * (2 * self.__size)
+        self.__min = [0] * self.__size + leaves
+        self.__max = [0] * self.__size + leaves
+        for node in range(self.__size - 1, 0, -1):
+            self.__min[node] = min(self.__min[2 * node], self.__min[2 * node + 1])
+            self.__max[node] = max(self.__max[2 * node], self.__max[2 * node + 1])
+
+    def __apply(self, node, delta):
+        self.__min[node] += delta
+        self.__max[node] += delta
+        self.__lazy[node] += delta
+
+    def __push(self, node):
+        if self.__lazy[node]:
+            self.__apply(2 * node, self.__lazy[node])
+            self.__apply(2 * node + 1, self.__lazy[node])
+            self.__lazy[node] = 0
+
+    def __add(self, node, node_start, node_end, start, end, delta):
+        if end <= node_start or node_end <= start:
+            return
+        if start <= node_start and node_end <= end:
+            self.__apply(node, delta)
+            return
+        self.__push(node)
+        mid = (node_start + node_end) // 2
+        self.__add(2 * node, node_start, mid, start, end, delta)
+        self.__add(2 * node + 1, mid, node_end, start, end, delta)
+        self.__min[node] = min(self.__min[2 * node], self.__min[2 * node + 1])
+        self.__max[node] = max(self.__max[2 * node], self.__max[2 * node + 1])
+
+    def __query_min(self, node, node_start, node_end, start, end):
+        if end <= node_start or node_end <= start:
+            return float("inf")
+        if start <= node_start and node_end <= end:
+            return self.__min[node]
+        self.__push(node)
+        mid = (node_start + node_end) // 2
+        return min(self.__query_min(2 * node, node_start, mid, start, end),
+                   self.__query_min(2 * node + 1, mid, node_end, start, end))
+
+    def __query_max(self, node, node_start, node_end, start, end):
+        if end <= node_start or node_end <= start:
+            return float("-inf")
+        if start <= node_start and node_end <= end:
+            return self.__max[node]
+        self.__push(node)
+        mid = (node_start + node_end) // 2
+        return max(self.__query_max(2 * node, node_start, mid, start, end),
+                   self.__query_max(2 * node + 1, mid, node_end, start, end))
+
+    def __first_below(self, node, node_start, node_end, start, bandwidth):
+        """first slot >= start in the node range with free bandwidth < bandwidth, None if there is none"""
+        if node_end <= start or self.__min[node] >= bandwidth:
+            return None
+        if node_end - node_start == 1:
+            return node_start
+        self.__push(node)
+        mid = (node_start + node_end) // 2
+        ret = self.__first_below(2 * node, node_start, mid, start, bandwidth)
+        if ret is None:
+            ret = self.__first_below(2 * node + 1, mid, node_end, start, bandwidth)
+        return ret
+
+    def __first_at_least(self, node, node_start, node_end, start, bandwidth):
+        """first slot >= start in the node range with free bandwidth >= bandwidth, None if there is none"""
+        if node_end <= start or self.__max[node] < bandwidth:
+            return None
+        if node_end - node_start == 1:
+            return node_start
+        self.__push(node)
+        mid = (node_start + node_end) // 2
+        ret = self.__first_at_least(2 * node, node_start, mid, start, bandwidth)
+        if ret is None:
+            ret = self.__first_at_least(2 * node + 1, mid, node_end, start, bandwidth)
+        return ret
+
+    def reserve(self, start, end, bandwidth):
+        """
+        Take bandwidth over the time range [start, end).
+        """
+        if end > self.__size:
+            self.__grow(end)
+        self.__add(1, 0, self.__size, start, end, -bandwidth)
+
+    def release(self, start, end, bandwidth):
+        """
+        Give back bandwidth over the time range [start, end).
+        """
+        if end > self.__size:
+            self.__grow(end)
+        self.__add(1, 0, self.__size, start, end, bandwidth)
+
+    def free_at(self, time):
+        """
+        Get free bandwidth at a time slot.
+        """
+        return self.min_free(time, time + 1)
+
+    def min_free(self, start, end):
+        """
+        Get the smallest free bandwidth over the time range [start, end).
+        """
+        ret = self.__query_min(1, 0, self.__size, start, end)
+        if end > self.__size:  # every slot past the horizon is free
+            ret = min(ret, self.capacity)
+        return ret
+
+    def max_free(self, start, end):
+        """
+        Get the largest free bandwidth over the time range [start, end).
+        """
+        ret = self.__query_max(1, 0, self.__size, start, end)
+        if end > self.__size:  # every slot past the horizon is free
+            ret = max(ret, self.capacity)
+        return ret
+
+    def earliest_free(self, bandwidth, not_before=0):
+        """
+        Get the earliest time slot, not before not_before, with at least bandwidth free.
+        :return: time slot, or None if bandwidth exceeds the link capacity
+        """
+        if bandwidth > self.capacity:
+            return None
+        ret = self.__first_at_least(1, 0, self.__size, not_before, bandwidth)
+        if ret is None:  # every slot past the horizon is free
+            ret = max(self.__size, not_before)
+        return ret
+
+    def earliest_start(self, bandwidth, duration, not_before=0):
+        """
+        Get the earliest start time, not before not_before, of a task that needs bandwidth for duration time slots.
+        Every step jumps past the first slot that is too full, so the number of O(log T) steps is bounded by the
+        number of reservations in the way.
+        :return: start time, or None if bandwidth exceeds the link capacity
+        """
+        start = self.earliest_free(bandwidth, not_before)
+        while start is not None:
+            blocked = self.__first_below(1, 0, self.__size, start, bandwidth)
+            if blocked is None or blocked >= start + duration:
+                return start
+            start = self.earliest_free(bandwidth, blocked + 1)
+        return None
@@ -0,0 +1,236 @@
+"""
+Binary checkpoints of a running scheduler simulation.
+A checkpoint holds the waiting queue, processing queue, completed list, current time and bandwidth of a run, so a
+long simulation can be resumed from the latest snapshot and produce identical results.
+File layout: a fixed header (which also holds the event count and the scheduling policy of the run) and the file
+name of the completed log, followed by one record of int64 values per task (see Task.to_state), waiting queue tasks
+first (in queue order), then processing queue tasks.
+Completed tasks never change, so they are appended to a completed log next to the checkpoint instead: a snapshot
+only appends the tasks completed since the previous one, and its header holds how many log records are its
+completed list.
+A run can also keep a timeline of snapshots in a directory, one file per snapshot named by its event number, all
+sharing one completed log, which is used to re-run only the part of a simulation affected by task edits (see
+rescheduling.py).
+"""
+import os
+import re
+import sys
+import struct
+from array import array
+from collections import deque, namedtuple
+
+from task import Task, TaskPriority
+
+CHECKPOINT_MAGIC = b"RACP"
+CHECKPOINT_VERSION = 6
+TASK_STATE_FIELDS = 17  # number of values returned by Task.to_state
+_RECORD_SIZE = TASK_STATE_FIELDS * array("q").itemsize
+
+# magic, version, current time, latest processed time slice, total bandwidth, original bandwidth, events number,
+# waiting/processing/completed task counts, batch admission, aging, aging rate per TaskPriority, completed log name
+# length
+_HEADER = struct.Struct("<4sHqqqqqqqq??" + "d" * len(TaskPriority) + "H")
+_TIMELINE_NAME = re.compile(r"^checkpoint_(\d+)\.bin$")
+_TIMELINE_COMPLETED_LOG = "completed.bin"
+
+# events_num: scheduler loop iterations run so far, policy: see scheduler_policy, None if not known
+SchedulerState = namedtuple("SchedulerState", ["waiting_queue", "processing_queue", "completed_queue",
+                                               "current_time", "total_bandwidth", "orig_bandwidth",
+                                               "max_processed_time", "events_num", "policy"],
+                            defaults=(0, None))
+
+
+def state_tasks(state):
+    """
+    List all the tasks of a SchedulerState: waiting, running and completed.
+    """
+    ret = [one_task for one_queue in state.waiting_queue.values() for one_task in one_queue]
+    return ret + list(state.processing_queue) + list(state.completed_queue)
+
+
+def scheduler_policy(batch_admission=False, aging=None):
+    """
+    Policy flags of a preemptive scheduling run, as stored in checkpoints.
+    :return: tuple of (batch admission, tuple of aging rates per TaskPriority or None without aging)
+    """
+    return bool(batch_admission), None if aging is None else tuple(float(aging.get(priority, 0))
+                                                                   for priority in TaskPriority)
+
+
+class CheckpointFormatException(Exception):
+    def __init__(self, path):
+        super().__init__("Not a valid scheduler checkpoint: {}".format(path))
+
+
+class CheckpointPolicyException(Exception):
+    def __init__(self, saved_policy, policy):
+        super().__init__("Checkpoint of a run with another scheduling policy: {} instead of {}".format(
+            saved_policy, policy))
+
+
+def _pack_tasks(task_iter):
+    """pack task states into a flat int64 array"""
+    records = array("q")
+    for one_task in task_iter:
+        records.extend(one_task.to_state())
+    if sys.byteorder == "big":
+        records.byteswap()
+    return records
+
+
+def _unpack_tasks(records, start, count):
+    """unpack count tasks from a flat int64 array, starting at task number start"""
+    ret = []
+    for i in range(start, start + count):
+        offset = i * TASK_STATE_FIELDS
+        ret.append(Task.from_state(tuple(records[offset:offset + TASK_STATE_FIELDS])))
+    return ret
+
+
+def _read_records(fin, tasks_num, path):
+    """read tasks_num task records"""
+    records = array("q")
+    try:
+        records.fromfile(fin, tasks_num * TASK_STATE_FIELDS)
+    except EOFError:
+        raise CheckpointFormatException(path)
+    if sys.byteorder == "big":
+        records.byteswap()
+    return records
+
+
+def completed_log_path(path):
+    """
+    Get the file name of the completed log of a checkpoint file.
+    """
+    return path + ".completed"
+
+
+def append_completed_log(log_path, completed_queue, saved_num=0):
+    """
+    Write the completed tasks of a run to its completed log, appending only the ones not saved yet.
+    :param log_path: completed log file name
+    :param completed_queue: list of completed tasks, in completion order
+    :param saved_num: number of tasks of completed_queue the log already holds, as its first records. Records
+        after them (of a crashed run) are dropped, and a shorter log is written again from the start.
+    :return: number of tasks the log holds, to pass as saved_num the next time
+    """
+    saved_num = min(saved_num, os.path.getsize(log_path) // _RECORD_SIZE if os.path.exists(log_path) else 0)
+    with open(log_path, "r+b" if saved_num else "wb") as fout:
+        fout.seek(saved_num * _RECORD_SIZE)
+        fout.truncate()
+        _pack_tasks(completed_queue[saved_num:]).tofile(fout)
+    return len(completed_queue)
+
+
+def save_checkpoint(path, waiting_queue, processing_queue, completed_queue, current_time, total_bandwidth,
+                    orig_bandwidth, max_processed_time=-1, events_num=0, policy=None, completed_log=None,
+                    completed_saved=0):
+    """
+    Snapshot simulation state to a binary file. The file is replaced atomically, and written after the completed
+    log, so a crash during the write leaves the previous checkpoint intact.
+    :param path: checkpoint file name
+    :param waiting_queue: dictionary of start time -> deque of waiting tasks
+    :param processing_queue: list of running tasks
+    :param completed_queue: list of completed tasks
+    :param current_time: simulation time
+    :param total_bandwidth: currently free bandwidth
+    :param orig_bandwidth: total bandwidth of the run
+    :param max_processed_time: latest time slice popped from the waiting queue so far, -1 if none. Time slices can
+        be revisited (preempted tasks are re-queued at their start time), so it can be ahead of current_time.
+    :param events_num: scheduler loop iterations run so far
+    :param policy: scheduling policy of the run, see scheduler_policy, default scheduler_policy()
+    :param completed_log: completed log file name, in the directory of path, default completed_log_path(path)
+    :param completed_saved: number of completed tasks the completed log already holds, see append_completed_log
+    :return: number of completed tasks the completed log holds
+    """
+    batch_admission, aging_rates = policy or scheduler_policy()
+    completed_log = completed_log or completed_log_path(path)
+    completed_saved = append_completed_log(completed_log, completed_queue, completed_saved)
+    log_name = os.path.basename(completed_log).encode()
+    waiting_tasks = [one_task for one_queue in waiting_queue.values() for one_task in one_queue]
+    records = _pack_tasks(waiting_tasks)
+    records.extend(_pack_tasks(processing_queue))
+    header = _HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, current_time, max_processed_time, total_bandwidth,
+                          orig_bandwidth, events_num, len(waiting_tasks), len(processing_queue), len(completed_queue),
+                          batch_admission, aging_rates is not None, *(aging_rates or (0.0,) * len(TaskPriority)),
+                          len(log_name))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as fout:
+        fout.write(header)
+        fout.write(log_name)
+        records.tofile(fout)
+    os.replace(tmp_path, path)
+    return completed_saved
+
+
+def _read_header(fin, path):
+    """read and validate the checkpoint header, return its values after the version and the completed log name"""
+    header = fin.read(_HEADER.size)
+    if len(header) != _HEADER.size:
+        raise CheckpointFormatException(path)
+    header = _HEADER.unpack(header)
+    if header[0] != CHECKPOINT_MAGIC or header[1] != CHECKPOINT_VERSION:
+        raise CheckpointFormatException(path)
+    log_name = fin.read(header[-1])
+    if len(log_name) != header[-1]:
+        raise CheckpointFormatException(path)
+    return header[2:-1], log_name.decode()
+
+
+def checkpoint_max_processed_time(path):
+    """
+    Get the latest processed time slice of a checkpoint, reading only its header.
+    """
+    with open(path, "rb") as fin:
+        return _read_header(fin, path)[0][1]
+
+
+def load_checkpoint(path):
+    """
+    Load simulation state saved by save_checkpoint.
+    :param path: checkpoint file name
+    :return: SchedulerState with freshly built Task objects
+    """
+    with open(path, "rb") as fin:
+        header, log_name = _read_header(fin, path)
+        (current_time, max_processed_time, total_bandwidth, orig_bandwidth, events_num,
+         n_waiting, n_processing, n_completed, batch_admission, has_aging) = header[:10]
+        records = _read_records(fin, n_waiting + n_processing, path)
+    with open(os.path.join(os.path.dirname(path), log_name), "rb") as fin:
+        completed_queue = _unpack_tasks(_read_records(fin, n_completed, path), 0, n_completed)
+    waiting_queue = {}
+    for one_task in _unpack_tasks(records, 0, n_waiting):
+        # waiting tasks are always queued under their actual start time
+        waiting_queue.setdefault(one_task.actual_start_time, deque()).append(one_task)
+    processing_queue = _unpack_tasks(records, n_waiting, n_processing)
+    policy = (batch_admission, tuple(header[10:]) if has_aging else None)
+    return SchedulerState(waiting_queue, processing_queue, completed_queue, current_time, total_bandwidth,
+                          orig_bandwidth, max_processed_time, events_num, policy)
+
+
+def timeline_completed_log(timeline_dir):
+    """
+    Get the file name of the completed log shared by the snapshots of a timeline directory.
+    """
+    return os.path.join(timeline_dir, _TIMELINE_COMPLETED_LOG)
+
+
+def timeline_path(timeline_dir, events_num):
+    """
+    Get the file name of the timeline snapshot taken after events_num events.
+    """
+    return os.path.join(timeline_dir, "checkpoint_{:010d}.bin".format(events_num))
+
+
+def list_timeline(timeline_dir):
+    """
+    List the snapshots of a timeline directory.
+    :return: list of (events number, file name), oldest snapshot first
+    """
+    ret = []
+    for file_name in os.listdir(timeline_dir):
+        match = _TIMELINE_NAME.match(file_name)
+        if match:
+            ret.append((int(match.group(1)), os.path.join(timeline_dir, file_name)))
+    return sorted(ret)
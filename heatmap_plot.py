@@ -1,6 +1,4 @@
 import numpy as np
-import seaborn as sns
-from matplotlib import pylab as plt
 
 
 class TaskHeatmap:
@@ -45,6 +43,10 @@ class TaskHeatmap:
 
     # Function to display the heatmap
     def show_plot(self):
+        # The plotting stack is slow to import, load it only when a plot is shown
+        import seaborn as sns
+        from matplotlib import pylab as plt
+
         fig, ax = plt.subplots()
         heatmap = sns.heatmap(self.task_matrix, cmap='Greens', ax=ax)
         plt.title("Task allocation graph",
@@ -0,0 +1,198 @@
+"""
+Offered load of a task list, computed from the data alone before simulating anything.
+The offered load at a time is the bandwidth the tasks would hold if every task started the moment it was created.
+It is built as a step curve from the sorted task start and end events and a running sum, in O(n log n) for n tasks,
+whatever the length of the timeline. The curve gives the demand statistics, the bandwidth needed so that no task has
+to wait, and lower bounds any policy is held to, which are used to skip hopeless configurations before a sweep.
+"""
+import argparse
+import os
+
+import numpy as np
+
+from algorithms import COMPRESSING_ALGORITHMS
+from utils import is_columnar
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+def _offered_loads(task_arrays, bandwidth_columns):
+    """offered load curves of several bandwidth columns over the same, once sorted, start and end events"""
+    starts = task_arrays.created_time
+    event_times = np.concatenate((starts, starts + task_arrays.total_duration + 1))
+    order = np.argsort(event_times, kind="stable")
+    event_times = event_times[order]
+    last_of_time = np.append(event_times[1:] != event_times[:-1], True)  # the running sum after all events of a time
+    demands = [np.cumsum(np.concatenate((bandwidths, -bandwidths))[order])[last_of_time]
+               for bandwidths in bandwidth_columns]
+    return event_times[last_of_time], demands
+
+
+def offered_load(task_arrays, compressed=False):
+    """
+    Build the offered load curve. A task holds its bandwidth from its created time to its end time inclusive.
+    :param task_arrays: TaskArrays (or LazyTaskList) of tasks that were not scheduled yet
+    :param compressed: use the minimal bandwidth of every task instead of its bandwidth
+    :return: tuple of (times, demand) arrays: the offered load is demand[k] from times[k] up to times[k + 1], and 0
+        from the last time on
+    """
+    task_arrays = task_arrays.arrays
+    times, (demand,) = _offered_loads(task_arrays, [task_arrays.min_bandwidth if compressed
+                                                    else task_arrays.bandwidth])
+    return times, demand
+
+
+def demand_percentiles(times, demand, percentiles=DEFAULT_PERCENTILES):
+    """
+    Time weighted percentiles of an offered load curve, over the time from the first task arrival to the end of the
+    last task.
+    :return: dictionary of percentile -> demand
+    """
+    lengths = np.diff(times)
+    if not len(lengths):
+        return {one_percentile: 0 for one_percentile in percentiles}
+    order = np.argsort(demand[:-1], kind="stable")
+    sorted_demand = demand[:-1][order]
+    covered = np.cumsum(lengths[order])
+    ret = {}
+    for one_percentile in percentiles:
+        position = np.searchsorted(covered, covered[-1] * one_percentile / 100)
+        ret[one_percentile] = int(sorted_demand[min(position, len(sorted_demand) - 1)])
+    return ret
+
+
+def makespan_lower_bounds(task_arrays, bandwidths, compressed=True, stats=None):
+    """
+    Lower bounds of the end time of the last task (AlgoTester.time_end) under any policy.
+    No task ends before its created time + duration, and the tasks created at time t or later need at least
+    (minimal bandwidth * duration) bandwidth units in total after t, at most the total bandwidth per time unit.
+    :param task_arrays: TaskArrays (or LazyTaskList) of tasks that were not scheduled yet, not used with stats
+    :param bandwidths: total available bandwidths
+    :param compressed: the policy may start a task with its minimal bandwidth (see
+        algorithms.COMPRESSING_ALGORITHMS), otherwise a task only starts with its whole bandwidth
+    :param stats: summary stats of the task list (see task_gen.task_list_stats, e.g. from its sidecar index),
+        default compute them
+    :return: list of bounds in bandwidths order, None for a bandwidth below the bandwidth (the minimal bandwidth,
+        with compressed) of some task, which can then never start
+    """
+    if stats is None:
+        from task_gen import task_list_stats
+
+        stats = task_list_stats(task_arrays.arrays)
+    if not stats["tasks"]:
+        return [0] * len(bandwidths)
+    start_bandwidth = stats["min_bandwidth" if compressed else "max_bandwidth"]
+    ret = []
+    for total_bandwidth in bandwidths:
+        if total_bandwidth < start_bandwidth:
+            ret.append(None)
+        elif total_bandwidth == 0:  # only tasks without a minimal bandwidth
+            ret.append(stats["time_end"])
+        else:
+            work_bounds = stats["later_created"] - 1 + -(-stats["later_work"] // total_bandwidth)
+            ret.append(max(stats["time_end"], int(work_bounds.max())))
+    return ret
+
+
+def makespan_lower_bound(task_arrays, total_bandwidth, compressed=True, stats=None):
+    """
+    Lower bound of the end time of the last task under any policy, see makespan_lower_bounds.
+    :return: the bound, None if some task needs more than total_bandwidth and can never start
+    """
+    return makespan_lower_bounds(task_arrays, [total_bandwidth], compressed, stats)[0]
+
+
+def analyze_load(task_list, total_bandwidth=None, percentiles=DEFAULT_PERCENTILES, stats=None):
+    """
+    Analyze the offered load of a task list.
+    :param task_list: TaskArrays, LazyTaskList or list of tasks that were not scheduled yet
+    :param total_bandwidth: also bound the makespan with this total bandwidth
+    :param percentiles: demand percentiles to report
+    :param stats: summary stats of the task list (see task_gen.task_list_stats), default compute them
+    :return: dictionary of: tasks, time_start and time_end (first created time, latest created time + duration),
+        peak_demand and peak_time, mean_demand, demand_percentiles (percentile -> demand), min_bandwidth (largest
+        minimal task bandwidth, below it some task can never start), zero_wait_bandwidth (peak demand, below it
+        some task has to wait under any policy that does not compress), compressed_zero_wait_bandwidth (the same
+        with every task compressed) and, with a total bandwidth, makespan_lower_bound (see makespan_lower_bound)
+    """
+    from task_arrays import TaskArrays
+
+    task_arrays = task_list.arrays if is_columnar(task_list) else TaskArrays.from_tasks(task_list)
+    ret = {"tasks": len(task_arrays)}
+    if not len(task_arrays):
+        return ret
+    times, (demand, compressed_demand) = _offered_loads(task_arrays, [task_arrays.bandwidth,
+                                                                      task_arrays.min_bandwidth])
+    peak = int(np.argmax(demand))
+    ret.update(time_start=int(times[0]),
+               time_end=int(times[-1]) - 1,
+               peak_demand=int(demand[peak]),
+               peak_time=int(times[peak]),
+               mean_demand=float((demand[:-1] * np.diff(times)).sum() / max(1, times[-1] - times[0])),
+               demand_percentiles=demand_percentiles(times, demand, percentiles),
+               min_bandwidth=int(task_arrays.min_bandwidth.max()),
+               zero_wait_bandwidth=int(demand.max()),
+               compressed_zero_wait_bandwidth=int(compressed_demand.max()))
+    if total_bandwidth is not None:
+        ret["makespan_lower_bound"] = makespan_lower_bound(task_arrays, total_bandwidth, stats=stats)
+    return ret
+
+
+def prune_bandwidths(task_list, bandwidths, max_time_end=None, algo_fps=None, stats=None):
+    """
+    Split the total bandwidths of a sweep into the ones worth simulating and the hopeless ones: a bandwidth below
+    the bandwidth of some task can never finish the list (below its minimal bandwidth, for the algorithms that
+    compress arriving tasks), and with max_time_end, a bandwidth whose makespan lower bound is later than
+    max_time_end can never meet it.
+    :param task_list: TaskArrays, LazyTaskList or list of tasks that were not scheduled yet, not used with stats
+    :param bandwidths: total bandwidths to check
+    :param max_time_end: latest acceptable end time of the last task, default no limit
+    :param algo_fps: algorithm function pointers (or functools.partial of them) the bandwidths are simulated with, a
+        bandwidth is pruned only when it is hopeless for all of them. Default any policy, tasks may be compressed
+    :param stats: summary stats of the task list (see task_gen.task_list_stats, e.g. from its sidecar index), the
+        pruning needs nothing else
+    :return: tuple of (list of bandwidths to simulate, dictionary of pruned bandwidth -> reason)
+    """
+    if stats is None:
+        from task_arrays import TaskArrays
+        from task_gen import task_list_stats
+
+        stats = task_list_stats(task_list.arrays if is_columnar(task_list) else TaskArrays.from_tasks(task_list))
+    compressed = algo_fps is None or any(getattr(algo_fp, "func", algo_fp) in COMPRESSING_ALGORITHMS
+                                         for algo_fp in algo_fps)
+    kept = []
+    pruned = {}
+    for total_bandwidth, bound in zip(bandwidths, makespan_lower_bounds(None, bandwidths, compressed, stats)):
+        if bound is None:
+            pruned[total_bandwidth] = "below the {}bandwidth of a task ({})".format(
+                "minimal " if compressed else "", stats["min_bandwidth" if compressed else "max_bandwidth"])
+        elif max_time_end is not None and bound > max_time_end:
+            pruned[total_bandwidth] = "makespan lower bound {} is after {}".format(bound, max_time_end)
+        else:
+            kept.append(total_bandwidth)
+    return kept, pruned
+
+
+def parse_args():
+    """
+    parse cmd line args
+    """
+    parser = argparse.ArgumentParser(description='Analyze the offered load of a task list.')
+    parser.add_argument('task_list', type=str, help='JSON task list, or directory of an imported trace')
+    parser.add_argument('--bandwidth', type=int, default=None, help='Total bandwidth to bound the makespan with')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if os.path.isdir(args.task_list):
+        from trace_import import load_trace
+        loaded_tasks = load_trace(args.task_list)
+        loaded_stats = None
+    else:
+        from task_arrays import TaskArrays
+        from task_gen import load_task_list_index
+        loaded_tasks = TaskArrays.from_json_file(args.task_list)
+        _, loaded_stats = load_task_list_index(args.task_list, loaded_tasks)
+    for key, value in analyze_load(loaded_tasks, args.bandwidth, stats=loaded_stats).items():
+        print("{}: {}".format(key, value))
@@ -0,0 +1,118 @@
+"""
+Scheduling of several independent links (resource pools) in one run.
+Every link has its own capacity and its own task stream, tasks are routed by the link_id of the task record.
+Links do not share bandwidth, so each link is simulated in its own worker process and the per-link results are
+merged into aggregate metrics.
+"""
+import multiprocessing as mps
+
+import task
+import task_gen
+from algo_tester import AlgoTester
+
+
+class UnknownLinkException(Exception):
+    def __init__(self, link_id):
+        super().__init__("Task routed to unknown link: {}".format(link_id))
+
+
+class InfeasibleLinkException(Exception):
+    def __init__(self, link_id, reason):
+        super().__init__("Link {} can never finish its tasks: {}".format(link_id, reason))
+
+
+def _link_worker(job):
+    """
+    Worker: run the algorithm on the tasks of one link.
+    :param job: tuple of (algorithm function pointer, link id, task list, link bandwidth)
+    :return: tuple of (link id, tester holding the link results)
+    """
+    algo_fp, link_id, task_list, link_bandwidth = job
+    tester = AlgoTester.from_task_list(task_list, link_bandwidth)
+    tester.test(algo_fp)
+    return link_id, tester
+
+
+class MultiLinkTester:
+    def __init__(self, task_list_file, link_bandwidths):
+        """
+        :param task_list_file: JSON task list, tasks are routed by their link_id
+        :param link_bandwidths: dictionary of link id -> total bandwidth of the link
+        """
+        self.link_bandwidths = link_bandwidths
+        self.task_list = task_gen.from_json_file(task_list_file)
+        self.link_testers = {}  # link id -> AlgoTester with the link results
+        self.scores_dict = {}
+        self.time_start = 0
+        self.time_end = 0
+
+    def split_by_link(self):
+        """
+        Group the task list by link id.
+        :return: dictionary of link id -> list of tasks, every configured link is present
+        """
+        link_tasks = {link_id: [] for link_id in self.link_bandwidths}
+        for one_task in self.task_list:
+            if one_task.link_id not in link_tasks:
+                raise UnknownLinkException(one_task.link_id)
+            link_tasks[one_task.link_id].append(one_task)
+        return link_tasks
+
+    def test(self, algo_fp, processes=None):
+        """
+        Run the algorithm on all links in parallel and compute the aggregate scores. Links without tasks are left
+        out. A link narrower than one of its tasks would never finish it, so it is rejected before anything runs.
+        :param algo_fp: Algorithm function pointer to be tested.
+        :param processes: number of worker processes, default cpu count
+        """
+        from load_analysis import prune_bandwidths
+
+        jobs = []
+        for link_id, link_tasks in self.split_by_link().items():
+            if not link_tasks:
+                continue
+            _, pruned = prune_bandwidths(link_tasks, [self.link_bandwidths[link_id]], algo_fps=[algo_fp])
+            if pruned:
+                raise InfeasibleLinkException(link_id, pruned[self.link_bandwidths[link_id]])
+            jobs.append((algo_fp, link_id, link_tasks, self.link_bandwidths[link_id]))
+        self.link_testers = {}
+        if jobs:
+            with mps.Pool(processes) as pool:
+                self.link_testers = dict(pool.map(_link_worker, jobs))
+        self.time_start = min((tester.time_start for tester in self.link_testers.values()), default=0)
+        self.time_end = max((tester.time_end for tester in self.link_testers.values()), default=0)
+        self.aggregate_scores()
+
+    def aggregate_scores(self):
+        """
+        Merge the per-link scores into [tasks number, total score, average score] per priority.
+        """
+        priority_names = [name for name, member in task.TaskPriority.__members__.items()]
+        self.scores_dict = {priority: [0, 0, 0] for priority in priority_names}
+        for tester in self.link_testers.values():
+            for one_prio, (tasks_num, total_score, _) in tester.scores_dict.items():
+                self.scores_dict[one_prio][0] += tasks_num
+                self.scores_dict[one_prio][1] += total_score
+        for one_prio in self.scores_dict:
+            tasks_num = self.scores_dict[one_prio][0]
+            total_score = self.scores_dict[one_prio][1]
+            try:
+                avg_score = int(total_score / tasks_num)
+            except ZeroDivisionError:
+                avg_score = "N/A"
+            self.scores_dict[one_prio][2] = avg_score
+        return self.scores_dict
+
+    def avg_score_per_priority_str(self):
+        """
+        Return a string representation of the average score per priority, per link and for all links.
+        """
+        ret = ""
+        for link_id in sorted(self.link_testers):
+            ret += "Link {} (bandwidth {}): {}\n".format(link_id, self.link_bandwidths[link_id],
+                                                          self.link_testers[link_id].avg_score_per_priority_str())
+        ret += "All links: Average Score per priority: "
+        for one_prio in self.scores_dict.keys():
+            ret += "{}:{} ".format(one_prio, self.scores_dict[one_prio][2])
+        ret += ". Total Start Time: {}, Total End Time: {}".format(self.time_start, self.time_end)
+        return ret
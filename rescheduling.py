@@ -0,0 +1,141 @@
+"""
+Incremental (what-if) re-scheduling after task list edits.
+A preemptive scheduling run started with a timeline_dir keeps a snapshot of its state every checkpoint_interval
+events. A task edit cannot change anything before the scheduler reaches the time slice of the task, so the edited
+list is re-scheduled by resuming from the latest snapshot taken before that time slice was first processed, with the
+edited tasks swapped in, instead of simulating the whole list again.
+"""
+import time
+from collections import deque
+
+from algorithms import preemptive_scheduling_algorithm
+from checkpoint import checkpoint_max_processed_time, list_timeline, load_checkpoint
+from task import Task
+
+# Task fields (see Task.to_dict) that can be edited
+EDITABLE_FIELDS = ("bandwidth", "min_bandwidth", "original_bandwidth", "created_time", "actual_start_time",
+                   "duration", "priority")
+
+
+class UnknownTaskException(Exception):
+    def __init__(self, task_id):
+        super().__init__("Edit of unknown task: {}".format(task_id))
+
+
+class TaskFieldException(Exception):
+    def __init__(self, field):
+        super().__init__("Task field can not be edited: {}".format(field))
+
+
+def edit_task(one_task, changes):
+    """
+    Create an edited copy of a task that was not scheduled yet.
+    :param one_task: task to edit, left untouched
+    :param changes: dictionary of field name (see EDITABLE_FIELDS) -> new value. A new created_time also moves the
+        start time and a new bandwidth also changes the original bandwidth, unless they are given too.
+    :return: new Task with the same id
+    """
+    for field in changes:
+        if field not in EDITABLE_FIELDS:
+            raise TaskFieldException(field)
+    task_dict = one_task.to_dict()
+    task_dict.update(changes)
+    if "created_time" in changes and "actual_start_time" not in changes:
+        task_dict["actual_start_time"] = changes["created_time"]
+    if "bandwidth" in changes and "original_bandwidth" not in changes:
+        task_dict["original_bandwidth"] = changes["bandwidth"]
+    new_task = Task()
+    new_task.from_dict(task_dict)
+    return new_task
+
+
+def apply_task_edits(task_list, edits):
+    """
+    Create a copy of a task list with edited tasks.
+    :param task_list: list of tasks that were not scheduled yet, left untouched
+    :param edits: dictionary of task id -> changes, see edit_task
+    :return: new list of tasks, in the same order
+    """
+    task_ids = {one_task.id for one_task in task_list}
+    for task_id in edits:
+        if task_id not in task_ids:
+            raise UnknownTaskException(task_id)
+    return [edit_task(one_task, edits[one_task.id]) if one_task.id in edits else Task.from_state(one_task.to_state())
+            for one_task in task_list]
+
+
+def _latest_unaffected_snapshot(timeline_dir, affected_time):
+    """latest (events number, file name) of the timeline that never processed affected_time, None if none did"""
+    for events_num, path in reversed(list_timeline(timeline_dir)):
+        if checkpoint_max_processed_time(path) < affected_time:
+            return events_num, path
+    return None
+
+
+def _swap_edited_tasks(state, task_list, edited_tasks):
+    """
+    Replace the original tasks in the waiting queue of a snapshot with their edited copies. Every time slice still
+    holds its arriving tasks first, in task list order, so an edited task is inserted among them at its task list
+    position.
+    """
+    positions = {one_task.id: i for i, one_task in enumerate(task_list)}
+    arrival_times = {one_task.id: one_task.actual_start_time for one_task in task_list}
+    arrival_times.update((task_id, new_task.actual_start_time) for task_id, new_task in edited_tasks.items())
+    for one_task in task_list:
+        if one_task.id not in edited_tasks:
+            continue
+        one_queue = state.waiting_queue[one_task.actual_start_time]
+        for queued_task in one_queue:
+            if queued_task.id == one_task.id:
+                one_queue.remove(queued_task)
+                break
+        if not one_queue:
+            del state.waiting_queue[one_task.actual_start_time]
+    for new_task in sorted(edited_tasks.values(), key=lambda edited_task: positions[edited_task.id]):
+        one_queue = state.waiting_queue.setdefault(new_task.actual_start_time, deque())
+        index = 0
+        while (index < len(one_queue) and
+               one_queue[index].actual_start_time == arrival_times[one_queue[index].id] and
+               positions[one_queue[index].id] < positions[new_task.id]):
+            index += 1  # skip the tasks arriving before the edited task
+        one_queue.insert(index, new_task)
+
+
+def delta_reschedule(task_list, total_bandwidth, timeline_dir, edits, verify=False, **algo_kwargs):
+    """
+    Re-schedule a task list after edits, reusing the timeline of the run of the original list.
+    :param task_list: the original task list as given to the recorded run, before it was scheduled (e.g. loaded
+        again from its JSON file), left untouched
+    :param total_bandwidth: total available bandwidth
+    :param timeline_dir: timeline directory of the preemptive_scheduling_algorithm run of the original list
+    :param edits: dictionary of task id -> changes, see edit_task
+    :param verify: also re-schedule the edited list from scratch and compare
+    :param algo_kwargs: other arguments the recorded run was started with, e.g. aging
+    :return: tuple of (list of completed tasks, report dictionary)
+    """
+    edited_list = apply_task_edits(task_list, edits)
+    edited_tasks = {one_task.id: one_task for one_task in edited_list if one_task.id in edits}
+    # The first time slice that holds an edited task, before or after the edit
+    affected_time = min(min(one_task.actual_start_time, edited_tasks[one_task.id].actual_start_time)
+                        for one_task in task_list if one_task.id in edits)
+
+    start = time.perf_counter()
+    snapshot = _latest_unaffected_snapshot(timeline_dir, affected_time)
+    report = {"affected_time": affected_time, "snapshot": None, "reused_events": 0, "resumed_time": None}
+    if snapshot is None:
+        completed = preemptive_scheduling_algorithm(edited_list, total_bandwidth, **algo_kwargs)
+    else:
+        events_num, path = snapshot
+        state = load_checkpoint(path)
+        _swap_edited_tasks(state, task_list, edited_tasks)
+        completed = preemptive_scheduling_algorithm(None, None, state=state, **algo_kwargs)
+        report.update(snapshot=path, reused_events=events_num, resumed_time=state.current_time)
+    report["delta_time"] = time.perf_counter() - start
+
+    if verify:
+        start = time.perf_counter()
+        exact = preemptive_scheduling_algorithm(apply_task_edits(task_list, edits), total_bandwidth, **algo_kwargs)
+        report["full_time"] = time.perf_counter() - start
+        report["matches"] = (sorted(one_task.to_state() for one_task in completed) ==
+                             sorted(one_task.to_state() for one_task in exact))
+    return completed, report
@@ -0,0 +1,140 @@
+"""
+Structured log of algorithm test results.
+Workers send one result record per run over a multiprocessing queue and never touch the log file. A single collector
+process prints the records and appends them to a JSON Lines file in batches, one JSON object per line, so the results
+can be queried afterwards without parsing text.
+"""
+import json
+import queue
+import time
+from datetime import datetime
+
+
+def result_record(tester, algo_name, task_list_type, explanation_string):
+    """
+    Build the result record of a finished test.
+    :param tester: AlgoTester after test()
+    :param algo_name: name of the tested algorithm
+    :param task_list_type: name of the task list
+    :param explanation_string: description of the task list
+    :return: dictionary that can be serialized to JSON
+    """
+    scores = {}
+    for one_prio, (tasks_num, total_score, avg_score) in tester.scores_dict.items():
+        scores[one_prio] = {"tasks": tasks_num,
+                            "total_score": total_score,
+                            "avg_score": avg_score if tasks_num else None}
+    return {"run_time": datetime.now().isoformat(timespec="seconds"),
+            "algorithm": algo_name,
+            "task_list": task_list_type,
+            "description": explanation_string,
+            "total_bandwidth": tester.total_bandwidth,
+            "time_start": tester.time_start,
+            "time_end": tester.time_end,
+            "time_quantum": tester.time_quantum,
+            "quantization": tester.quantum_report,
+            "scores": scores}
+
+
+def format_quantization(report):
+    """
+    Return the human readable description of a time_quantum.quantization_report.
+    """
+    ret = ("Time quantum: {quantum} ({quanta} quanta for {time_units} time units, arrival shift up to "
+           "{max_arrival_shift}, mean {mean_arrival_shift:.1f}, duration inflation {duration_inflation:.1%}"
+           ).format(**report)
+    if "peak_bandwidth" in report:  # Not in the records of older logs
+        ret += ", peak bandwidth {peak_bandwidth}/{total_bandwidth}".format(**report)
+        if report["peak_bandwidth"] > report["total_bandwidth"]:
+            ret += " OVER CAPACITY"
+    if "score_deltas" in report:
+        ret += ", against time units: score change {}, end time change {:+}".format(
+            " ".join("{}:{:+}".format(one_prio, delta) for one_prio, delta in report["score_deltas"].items()),
+            report["end_time_delta"])
+    return ret + ")"
+
+
+def format_result(record):
+    """
+    Return the human readable lines of a result record.
+    """
+    run_time = datetime.fromisoformat(record["run_time"]).strftime("%m/%d/%Y, %H:%M:%S")
+    avg_scores = " ".join("{}:{}".format(one_prio, "N/A" if one_score["avg_score"] is None else one_score["avg_score"])
+                          for one_prio, one_score in record["scores"].items())
+    return ("Run Time: {}\n"
+            "{}: {}\n"
+            "{} average score for Task List \"{}\": Average Score per priority: {} . "
+            "Total Start Time: {}, Total End Time: {}{}\n").format(
+        run_time, record["task_list"], record["description"], record["algorithm"], record["task_list"], avg_scores,
+        record["time_start"], record["time_end"],
+        ". " + format_quantization(record["quantization"]) if record.get("quantization") else "")
+
+
+def write_results(records, log_file):
+    """
+    Append result records to a JSON Lines file.
+    """
+    with open(log_file, "a") as fout:
+        fout.writelines(json.dumps(one_record) + "\n" for one_record in records)
+
+
+def result_collector(result_queue, log_file=None, batch_size=16, flush_interval=1.0):
+    """
+    Collector process: print result records and write them to the log file in batches, until a None record is
+    received.
+    :param result_queue: multiprocessing queue the workers put their result records on
+    :param log_file: JSON Lines file to append to, default no log file
+    :param batch_size: number of records written at once
+    :param flush_interval: longest time in seconds a record is kept in the buffer
+    """
+    buffer = []
+    last_flush = time.monotonic()
+    while True:
+        try:
+            record = result_queue.get(timeout=flush_interval)
+        except queue.Empty:
+            record = {}  # Nothing arrived, only check if the buffer is due
+        if record is None:
+            break
+        if record:
+            print(format_result(record))
+            buffer.append(record)
+        if buffer and (len(buffer) >= batch_size or time.monotonic() - last_flush >= flush_interval):
+            if log_file:
+                write_results(buffer, log_file)
+            buffer = []
+            last_flush = time.monotonic()
+    if buffer and log_file:
+        write_results(buffer, log_file)
+
+
+def read_results(log_file, **filters):
+    """
+    Read result records from a JSON Lines file.
+    :param log_file: file written by result_collector
+    :param filters: only return records whose fields equal the given values, e.g. algorithm="Simple greedy algorithm"
+    :return: list of result records
+    """
+    ret = []
+    with open(log_file, "r") as fin:
+        for line in fin:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if all(record.get(field) == value for field, value in filters.items()):
+                ret.append(record)
+    return ret
+
+
+def best_results(log_file, priority, **filters):
+    """
+    Get the result records with the lowest (best) average score of a priority, the records without tasks of the
+    priority are skipped.
+    :param log_file: file written by result_collector
+    :param priority: priority name, e.g. "ENTERPRISE"
+    :param filters: see read_results
+    :return: list of result records sorted by average score
+    """
+    records = [one_record for one_record in read_results(log_file, **filters)
+               if one_record["scores"][priority]["avg_score"] is not None]
+    return sorted(records, key=lambda one_record: one_record["scores"][priority]["avg_score"])
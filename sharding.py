@@ -0,0 +1,325 @@
+"""
+Time-window sharding of large task lists.
+The timeline is split into windows with roughly the same number of arriving tasks, and every window is simulated in
+its own worker process as if the link were idle when the window starts. A sequential fix-up pass then reconciles the
+windows in order. It carries the exact scheduler state at every boundary (waiting tasks, and running tasks with
+their bandwidth and remaining time) into the next window: the resumable algorithms stop before a time slice and
+continue from the state they stopped in, and tasks arriving after the boundary can not change the state at the
+boundary, so the carried state is the one of the sequential run.
+A window entered with an idle link is taken from its worker as it is. Otherwise it is re-simulated from the carried
+state only until its state matches the worker run at one of the window probe times, which are spaced by doubling
+arrival counts. Two runs in the same state stay the same, so the worker result is used from there on. Only the tasks
+the boundary state reaches are simulated twice, and the result is the one of the sequential run.
+On a loaded link the boundary state reaches every window and the fix-up pass is as slow as the sequential run. The
+approximate mode does not wait for it: every window entered with a busy link is re-simulated in parallel from the
+boundary state the worker run of the previous window reached, and finishes the tasks still left at its end as if no
+later task arrived. A boundary state is known to be the sequential one when the previous boundary state was, and the
+previous window reached the same state at its end in its worker run and in its re-simulation. The tasks simulated
+from any later boundary state are reported as unverified, they bound the tasks that may differ from the sequential
+run.
+"""
+import multiprocessing as mps
+import time
+from bisect import bisect_left
+from collections import deque
+
+from algorithms import RESUMABLE_ALGORITHMS, sort_list
+from checkpoint import SchedulerState, state_tasks
+from task import Task
+
+
+class ShardingAlgorithmException(Exception):
+    def __init__(self, algo_fp):
+        super().__init__("Algorithm can not stop and resume, it can not be sharded: {}".format(
+            getattr(algo_fp, "__name__", algo_fp)))
+
+
+def split_windows(task_list, windows_num):
+    """
+    Split the timeline into windows holding roughly the same number of task arrivals.
+    :param task_list: list of tasks
+    :param windows_num: requested number of windows
+    :return: sorted list of window start times, the first window starts at the earliest created time
+    """
+    created_times = sorted(one_task.created_time for one_task in task_list)
+    starts = [created_times[0]]
+    for k in range(1, windows_num):
+        boundary = created_times[k * len(created_times) // windows_num]
+        if boundary > starts[-1]:  # tasks created at the same time always stay in the same window
+            starts.append(boundary)
+    return starts
+
+
+def probe_times(window_tasks, window_start, window_end):
+    """
+    Times a window run stops at to compare its state: the created times of the 1st, 2nd, 4th, 8th... arriving task
+    after the window start, then the window end.
+    :param window_tasks: tasks created in the window
+    :param window_start: window start time
+    :param window_end: start time of the next window, None for the last window (run to the end)
+    :return: sorted list of probe times, ending with window_end
+    """
+    created_times = sorted(one_task.created_time for one_task in window_tasks)
+    ret = []
+    position = 1
+    while position < len(created_times):
+        if created_times[position] > (ret[-1] if ret else window_start):
+            ret.append(created_times[position])
+        position *= 2
+    return ret + [window_end]
+
+
+def _busy(state):
+    """check if a scheduler state has running or waiting tasks left"""
+    return bool(state.processing_queue or any(state.waiting_queue.values()))
+
+
+def state_signature(state, stop_time):
+    """
+    Comparable form of a scheduler state stopped at stop_time. Waiting time slices are taken in the order they are
+    admitted in (the stable priority sort of a resumed run), tasks arriving at or after stop_time are left out as
+    both compared runs hold the same ones, and the current time only matters while tasks run.
+    """
+    # tasks that arrived before stop_time only wait in the time slices up to stop_time
+    waiting = tuple((one_time, tuple(one_task.to_state()
+                                     for one_task in sort_list(state.waiting_queue[one_time], 'priority', True)
+                                     if one_task.created_time < stop_time))
+                    for one_time in sorted(one_time for one_time in state.waiting_queue if one_time <= stop_time))
+    current_time = state.current_time if state.processing_queue else None
+    return (current_time, state.total_bandwidth, tuple(one_task.to_state() for one_task in state.processing_queue),
+            waiting)
+
+
+def _add_arrivals(state, window_tasks):
+    """
+    Add the tasks of a window to the waiting queue of the state carried into it. Tasks created at the boundary were
+    queued before the tasks deferred into it, in task list order.
+    """
+    arrivals = {}
+    for one_task in window_tasks:
+        arrivals.setdefault(one_task.actual_start_time, deque()).append(one_task)
+    for one_time, one_queue in arrivals.items():
+        one_queue.extend(state.waiting_queue.get(one_time, ()))
+        state.waiting_queue[one_time] = one_queue
+
+
+def _idle_state(total_bandwidth):
+    """scheduler state of a link with no tasks"""
+    return SchedulerState({}, [], [], 0, total_bandwidth, total_bandwidth, -1)
+
+
+def _run_window(algo_fp, state, probes, signatures=None):
+    """
+    Continue a run over the probe times of a window.
+    :param state: scheduler state holding the window tasks, its completed queue is the one the run appends to
+    :param probes: probe times, see probe_times
+    :param signatures: state signatures of another run of the window, stop at the first probe the run matches
+    :return: tuple of (final state, or list of completed tasks after the last window, list of state signatures at
+        the probes, list of the number of completed tasks at the probes, index of the matching probe or None)
+    """
+    probe_signatures = []
+    completed_nums = []
+    for k, stop_time in enumerate(probes):
+        state = algo_fp(None, None, state=state, stop_time=stop_time)
+        if stop_time is None:
+            break  # The last window ran to the end
+        probe_signatures.append(state_signature(state, stop_time))
+        completed_nums.append(len(state.completed_queue))
+        if signatures is not None and probe_signatures[-1] == signatures[k]:
+            return state, probe_signatures, completed_nums, k
+    return state, probe_signatures, completed_nums, None
+
+
+def _simulate_window(job):
+    """
+    Worker: simulate the tasks of one window as if the link were idle at the window start.
+    :param job: tuple of (algorithm function, task states, total bandwidth, probe times)
+    :return: tuple of (list of completed task states, final state or None after the last window, state signatures
+        at the probes, number of completed tasks at the probes)
+    """
+    algo_fp, states, total_bandwidth, probes = job
+    state = _idle_state(total_bandwidth)
+    _add_arrivals(state, [Task.from_state(one_state) for one_state in states])
+    state, probe_signatures, completed_nums, _ = _run_window(algo_fp, state, probes)
+    if probes[-1] is None:
+        return [one_task.to_state() for one_task in state], None, probe_signatures, completed_nums
+    return ([one_task.to_state() for one_task in state.completed_queue], state._replace(completed_queue=[]),
+            probe_signatures, completed_nums)
+
+
+def _reconcile_window(job):
+    """
+    Worker: simulate the tasks of one window from the state the worker run of the previous window reached at the
+    boundary, then its tasks left at the window end as if no later task arrived.
+    :param job: tuple of (algorithm function, boundary state, task states, window end time or None)
+    :return: tuple of (list of completed task states, state signature at the window end or None, number of tasks
+        completed before the window end)
+    """
+    algo_fp, boundary_state, states, window_end = job
+    state = boundary_state._replace(completed_queue=[])
+    _add_arrivals(state, [Task.from_state(one_state) for one_state in states])
+    signature = None
+    boundary_num = 0
+    if window_end is not None:
+        state = algo_fp(None, None, state=state, stop_time=window_end)
+        signature = state_signature(state, window_end)
+        boundary_num = len(state.completed_queue)
+    return [one_task.to_state() for one_task in algo_fp(None, None, state=state)], signature, boundary_num
+
+
+def sharded_run(task_list, total_bandwidth, algo_fp, windows_num=4, processes=None, verify=False, exact=True):
+    """
+    Run an algorithm over a task list split into time windows simulated in parallel.
+    :param task_list: list of tasks, left untouched
+    :param total_bandwidth: total available bandwidth
+    :param algo_fp: algorithm function pointer, one of RESUMABLE_ALGORITHMS (or a functools.partial of one)
+    :param windows_num: number of time windows
+    :param processes: number of worker processes, default cpu count
+    :param verify: also run the exact sequential simulation and report the measured error and speedup
+    :param exact: reconcile the windows one after the other from the exact boundary states. Otherwise every window
+        is re-simulated in parallel from the boundary state the worker run of the previous window reached, see
+        approximate mode above, and the report bounds the tasks that may differ from the sequential run
+    :return: tuple of (list of completed tasks, report dictionary)
+    """
+    if getattr(algo_fp, "func", algo_fp) not in RESUMABLE_ALGORITHMS:
+        raise ShardingAlgorithmException(algo_fp)
+    run_start = time.perf_counter()
+    src_states = {one_task.id: one_task.to_state() for one_task in task_list}
+    starts = split_windows(task_list, windows_num)
+    windows = [[] for _ in starts]
+    for one_task in task_list:
+        windows[bisect_left(starts, one_task.created_time + 1) - 1].append(one_task)
+    window_ends = starts[1:] + [None]
+    window_probes = [probe_times(window_tasks, starts[k], window_ends[k]) for k, window_tasks in enumerate(windows)]
+
+    jobs = [(algo_fp, [src_states[one_task.id] for one_task in window_tasks], total_bandwidth, window_probes[k])
+            for k, window_tasks in enumerate(windows)]
+    with mps.Pool(processes) as pool:
+        window_results = pool.map(_simulate_window, jobs)
+        if not exact:
+            busy_windows = [k for k in range(1, len(windows)) if _busy(window_results[k - 1][1])]
+            reconciled = dict(zip(busy_windows, pool.map(_reconcile_window, [
+                (algo_fp, window_results[k - 1][1], jobs[k][1], window_ends[k]) for k in busy_windows])))
+    parallel_time = time.perf_counter() - run_start
+
+    fixup_start = time.perf_counter()
+    if exact:
+        completed, reconciled_windows, carried_num, at_risk_ids, unverified_ids = _exact_fixup(
+            algo_fp, total_bandwidth, src_states, windows, window_probes, window_results)
+    else:
+        completed, reconciled_windows, carried_num, at_risk_ids, unverified_ids = _approximate_fixup(
+            windows, window_results, reconciled)
+    fixup_time = time.perf_counter() - fixup_start
+
+    report = {"windows": len(starts),
+              "exact": exact,
+              "reconciled_windows": reconciled_windows,
+              "carried_tasks": carried_num,
+              # tasks whose schedule a boundary state could shift: the carried tasks and the window tasks
+              # re-simulated from the state carried into their window
+              "tasks_at_risk": len(at_risk_ids),
+              "at_risk_ratio": len(at_risk_ids) / len(task_list),
+              # tasks simulated from a boundary state that is not known to be the one of the sequential run, only
+              # these can differ from it
+              "unverified_tasks": len(unverified_ids),
+              "error_bound_ratio": len(unverified_ids) / len(task_list),
+              "parallel_time": parallel_time,
+              "fixup_time": fixup_time,
+              "sharded_time": time.perf_counter() - run_start}
+    if verify:
+        sequential_start = time.perf_counter()
+        sequential = algo_fp([Task.from_state(one_state) for one_state in src_states.values()], total_bandwidth)
+        report["sequential_time"] = time.perf_counter() - sequential_start
+        report["speedup"] = report["sequential_time"] / report["sharded_time"]
+        sequential_starts = {one_task.id: one_task.actual_start_time for one_task in sequential}
+        start_errors = {one_task.id: abs(one_task.actual_start_time - sequential_starts[one_task.id])
+                        for one_task in completed}
+        report["mismatched_tasks"] = sum(1 for error in start_errors.values() if error)
+        report["mismatched_verified"] = sum(1 for one_id, error in start_errors.items()
+                                              if error and one_id not in unverified_ids)
+        report["max_start_error"] = max(start_errors.values())
+        report["makespan_error"] = (max(one_task.actual_end_time for one_task in completed) -
+                                    max(one_task.actual_end_time for one_task in sequential))
+        report["matches"] = (sorted(one_task.to_state() for one_task in completed) ==
+                             sorted(one_task.to_state() for one_task in sequential))
+    return completed, report
+
+
+def _exact_fixup(algo_fp, total_bandwidth, src_states, windows, window_probes, window_results):
+    """
+    Fix-up pass of the exact mode: carry the exact state at every boundary into the next window.
+    :return: tuple of (list of completed tasks, number of reconciled windows, number of carried tasks, set of ids of
+        the tasks at risk, set of ids of the unverified tasks, always empty)
+    """
+    completed = []
+    carried_state = _idle_state(total_bandwidth)
+    carried_num = 0
+    reconciled_windows = 0
+    at_risk_ids = set()
+    for k, (completed_states, final_state, signatures, completed_nums) in enumerate(window_results):
+        if not _busy(carried_state):
+            # The link is idle at the boundary, the worker run is the sequential one
+            completed.extend(Task.from_state(one_state) for one_state in completed_states)
+            carried_state = final_state
+            continue
+        reconciled_windows += 1
+        carried_state = carried_state._replace(completed_queue=[])
+        carried_ids = [one_task.id for one_task in state_tasks(carried_state)]
+        carried_num += len(carried_ids)
+        at_risk_ids.update(carried_ids)
+        window_tasks = [Task.from_state(src_states[one_task.id]) for one_task in windows[k]]
+        _add_arrivals(carried_state, window_tasks)
+        state, _, _, matched = _run_window(algo_fp, carried_state, window_probes[k], signatures)
+        if matched is None:
+            # The boundary state reached the whole window
+            at_risk_ids.update(one_task.id for one_task in window_tasks)
+            completed.extend(state if window_probes[k][-1] is None else state.completed_queue)
+            carried_state = state
+        else:
+            # Both runs are in the same state from the matching probe on, the worker run continues exactly
+            matched_time = window_probes[k][matched]
+            at_risk_ids.update(one_task.id for one_task in window_tasks if one_task.created_time < matched_time)
+            completed.extend(state.completed_queue)
+            completed.extend(Task.from_state(one_state) for one_state in completed_states[completed_nums[matched]:])
+            carried_state = final_state
+    return completed, reconciled_windows, carried_num, at_risk_ids, set()
+
+
+def _approximate_fixup(windows, window_results, reconciled):
+    """
+    Fix-up pass of the approximate mode, it only merges the parallel results. A task left running or waiting at a
+    window end by the worker run of its window is taken from the re-simulation of the next window, any other task
+    from the run of its own window. A boundary state is the sequential one when the previous one was and the
+    previous window reached the same state at its end in both runs, from the first one that is not every later task
+    is unverified.
+    :param reconciled: window index -> result of _reconcile_window, for the windows entered with a busy link
+    :return: tuple of (list of completed tasks, number of reconciled windows, number of carried tasks, set of ids of
+        the tasks at risk, set of ids of the unverified tasks)
+    """
+    completed = []
+    carried_num = 0
+    at_risk_ids = set()
+    unverified_ids = set()
+    boundary_exact = True
+    for k, (completed_states, final_state, signatures, _) in enumerate(window_results):
+        left_ids = set() if final_state is None else {one_task.id for one_task in state_tasks(final_state)}
+        if k not in reconciled:
+            # Entered with an idle link, the worker run holds every task it did not leave at the window end
+            owned = [Task.from_state(one_state) for one_state in completed_states]
+            boundary_matches = True
+        else:
+            reconciled_states, signature, boundary_num = reconciled[k]
+            carried_num += len(state_tasks(window_results[k - 1][1]))
+            reconciled_tasks = [Task.from_state(one_state) for one_state in reconciled_states]
+            owned = [one_task for one_task in reconciled_tasks if one_task.id not in left_ids]
+            at_risk_ids.update(one_task.id for one_task in owned)
+            boundary_matches = signature is None or signature == signatures[-1]
+            if boundary_exact and not boundary_matches:
+                # Exact up to the window end, the tasks still left then ignore the next window
+                unverified_ids.update(one_task.id for one_task in reconciled_tasks[boundary_num:]
+                                      if one_task.id not in left_ids)
+        if not boundary_exact:
+            unverified_ids.update(one_task.id for one_task in owned)
+        completed.extend(owned)
+        boundary_exact = boundary_exact and boundary_matches
+    return completed, len(reconciled), carried_num, at_risk_ids, unverified_ids
@@ -32,9 +32,11 @@ class Task:
     # create counter object for generating task id
     id_iter = count(start=1, step=1)
 
-    # Initialize Task object with bandwidth, created_time, duration, and priority
-    def __init__(self, bandwidth=0, created_time=0, duration=0, priority=TaskPriority.REGULAR, min_bandwidth=0):
+    # Initialize Task object with bandwidth, created_time, duration, priority and the link it is routed to
+    def __init__(self, bandwidth=0, created_time=0, duration=0, priority=TaskPriority.REGULAR, min_bandwidth=0,
+                 link_id=0):
         self.__id = next(self.id_iter)
+        self.__link_id = link_id
         self.__bandwidth = bandwidth
         self.__original_bandwidth = bandwidth
         self.__min_bandwidth = min_bandwidth
@@ -50,6 +52,7 @@ class Task:
         self.__task_status = TaskStatus.PENDING
         self.__is_preempted = False
         self.__end_time_changed = False
+        self.__bandwidth_changes = []  # (time, bandwidth) of every bandwidth change while running
 
     # get task score
     @property
@@ -68,6 +71,11 @@ class Task:
     def id(self):
         return self.__id
 
+    # get id of the link (resource pool) the task is routed to
+    @property
+    def link_id(self):
+        return self.__link_id
+
     # Get task status
     @property
     def status(self) -> TaskStatus:
@@ -109,6 +117,36 @@ class Task:
     def bandwidth_diff(self):
         return self.__original_bandwidth - self.__bandwidth
 
+    # (time, bandwidth) of every recorded bandwidth change, see change_bandwidth
+    @property
+    def bandwidth_changes(self):
+        return list(self.__bandwidth_changes)
+
+    # set the bandwidth of a running task from at_time on and record the change, see bandwidth_segments
+    def change_bandwidth(self, val, at_time):
+        self.bandwidth = val
+        self.__bandwidth_changes.append((at_time, val))
+
+    def bandwidth_segments(self):
+        """
+        Split the run of the task by its recorded bandwidth changes. A task without changes runs with its bandwidth.
+        :return: list of (start time, end time, bandwidth) covering the actual start time to the actual end time, end
+            time exclusive
+        """
+        end_time = self.actual_end_time + 1
+        if not self.__bandwidth_changes:
+            return [(self.__actual_start_time, end_time, self.__bandwidth)]
+        segments = []
+        start_time, bandwidth = self.__actual_start_time, self.__original_bandwidth
+        for change_time, new_bandwidth in self.__bandwidth_changes:
+            if change_time > start_time:
+                segments.append((start_time, min(change_time, end_time), bandwidth))
+                start_time = change_time
+            bandwidth = new_bandwidth
+        if start_time < end_time:
+            segments.append((start_time, end_time, bandwidth))
+        return segments
+
     # Get created time of the task
     @property
     def created_time(self):
@@ -202,6 +240,7 @@ class Task:
         return (
             f"Task("
             f"id={self.id}, "
+            f"link_id={self.link_id}, "
             f"bandwidth={self.bandwidth}, "
             f"min_bandwidth={self.min_bandwidth}, "
             f"original_bandwidth={self.original_bandwidth}, "
@@ -230,8 +269,32 @@ class Task:
             'duration': self.__total_duration,
             'actual_end_time': self.actual_end_time,
             'priority': self.__priority.name,  # Assuming TaskPriority is an Enum
+            'link_id': self.__link_id,
         }
 
+    def to_state(self):
+        """return the full internal state of the task as a tuple of ints, used for binary checkpoints"""
+        return (self.__id, self.__bandwidth, self.__original_bandwidth, self.__min_bandwidth, self.__created_time,
+                self.__actual_start_time, self.__total_duration, self.__remaining_duration, int(self.__priority),
+                self.__score, self.__actual_end_time, int(self.__duration_changed), self.__preempted_time,
+                int(self.__task_status), int(self.__is_preempted), int(self.__end_time_changed), self.__link_id)
+
+    @classmethod
+    def from_state(cls, state):
+        """create task from a tuple produced by to_state, without consuming a new task id"""
+        new_task = cls.__new__(cls)
+        (new_task.__id, new_task.__bandwidth, new_task.__original_bandwidth, new_task.__min_bandwidth,
+         new_task.__created_time, new_task.__actual_start_time, new_task.__total_duration,
+         new_task.__remaining_duration, priority, new_task.__score, new_task.__actual_end_time, duration_changed,
+         new_task.__preempted_time, task_status, is_preempted, end_time_changed, new_task.__link_id) = state
+        new_task.__priority = TaskPriority(priority)
+        new_task.__duration_changed = bool(duration_changed)
+        new_task.__task_status = TaskStatus(task_status)
+        new_task.__is_preempted = bool(is_preempted)
+        new_task.__end_time_changed = bool(end_time_changed)
+        new_task.__bandwidth_changes = []
+        return new_task
+
     def from_dict(self, src_dict):
         """update task parameters from dictionary"""
         self.__id = src_dict['id']
@@ -243,4 +306,5 @@ class Task:
         self.__preempted_time = src_dict['actual_start_time']
         self.__total_duration = self.__remaining_duration = src_dict['duration']
         self.priority = src_dict['priority']
+        self.__link_id = src_dict.get('link_id', 0)  # task lists without links run on a single link
         self.__actual_end_time = self.__actual_start_time + self.__total_duration
@@ -0,0 +1,158 @@
+"""
+Columnar storage of a task list.
+Every task is one row of an int64 matrix holding the values of Task.to_state, so a task list can be scheduled and
+rated with array operations instead of one Python object per task. Task objects are only built on request.
+"""
+from collections.abc import Sequence
+
+import numpy as np
+
+from task import Task, TaskStatus
+import task_gen
+
+# Columns of the state matrix, in Task.to_state order
+STATE_COLUMNS = ("id", "bandwidth", "original_bandwidth", "min_bandwidth", "created_time", "actual_start_time",
+                 "total_duration", "remaining_duration", "priority", "score", "raw_end_time", "duration_changed",
+                 "preempted_time", "status", "is_preempted", "end_time_changed", "link_id")
+COLUMN_INDEX = {name: i for i, name in enumerate(STATE_COLUMNS)}
+
+
+def _column_property(name):
+    """read only property returning a view of one state column"""
+    index = COLUMN_INDEX[name]
+    return property(lambda self: self.states[:, index])
+
+
+class TaskArrays:
+    def __init__(self, states):
+        """
+        :param states: int64 matrix of shape (tasks number, len(STATE_COLUMNS)), one Task.to_state row per task
+        """
+        self.states = np.asarray(states, dtype=np.int64).reshape(-1, len(STATE_COLUMNS))
+
+    @classmethod
+    def from_tasks(cls, task_list):
+        """
+        Create columnar arrays from a list of Task objects, the tasks are left untouched.
+        """
+        return cls([one_task.to_state() for one_task in task_list])
+
+    @classmethod
+    def from_json_file(cls, in_file):
+        """
+        Load a JSON task list (see task_gen.from_json_file) into columnar arrays.
+        """
+        return cls.from_tasks(task_gen.from_json_file(in_file))
+
+    id = _column_property("id")
+    bandwidth = _column_property("bandwidth")
+    min_bandwidth = _column_property("min_bandwidth")
+    created_time = _column_property("created_time")
+    actual_start_time = _column_property("actual_start_time")
+    total_duration = _column_property("total_duration")
+    remaining_duration = _column_property("remaining_duration")
+    priority = _column_property("priority")
+    score = _column_property("score")
+    duration_changed = _column_property("duration_changed")
+    preempted_time = _column_property("preempted_time")
+    status = _column_property("status")
+    link_id = _column_property("link_id")
+
+    @property
+    def arrays(self):
+        """the arrays themselves, so TaskArrays and LazyTaskList can be used alike"""
+        return self
+
+    @property
+    def actual_end_time(self):
+        """end times, computed like Task.actual_end_time"""
+        return np.where(self.states[:, COLUMN_INDEX["end_time_changed"]] != 0,
+                        self.states[:, COLUMN_INDEX["raw_end_time"]], self.actual_start_time + self.total_duration)
+
+    def is_fresh(self):
+        """
+        Check that no task was scheduled yet: every task is pending, with its full duration and bandwidth, and was
+        never preempted, compressed or stretched.
+        """
+        states = self.states
+        return bool(np.all(states[:, COLUMN_INDEX["status"]] == TaskStatus.PENDING) and
+                    np.all(states[:, COLUMN_INDEX["remaining_duration"]] == self.total_duration) and
+                    np.all(states[:, COLUMN_INDEX["bandwidth"]] == states[:, COLUMN_INDEX["original_bandwidth"]]) and
+                    not np.any(states[:, COLUMN_INDEX["duration_changed"]]) and
+                    not np.any(states[:, COLUMN_INDEX["is_preempted"]]) and
+                    not np.any(states[:, COLUMN_INDEX["end_time_changed"]]))
+
+    @classmethod
+    def load(cls, in_file):
+        """
+        Load arrays saved by save.
+        """
+        with np.load(in_file) as data:
+            return cls(data["states"])
+
+    @classmethod
+    def concatenate(cls, arrays_list):
+        """
+        Join several TaskArrays into one, in the given order.
+        """
+        return cls(np.concatenate([one_arrays.states for one_arrays in arrays_list]))
+
+    def save(self, out_file):
+        """
+        Save the arrays in compressed numpy format (.npz).
+        """
+        np.savez_compressed(out_file, states=self.states)
+
+    def copy(self):
+        return TaskArrays(self.states.copy())
+
+    def frozen(self):
+        """
+        Get a read only view of the arrays, to share one loaded task list between runs as immutable task specs.
+        Every run works on its own state (a copy, or Task objects from to_tasks), writing to the view raises
+        ValueError.
+        """
+        states = self.states.view()
+        states.flags.writeable = False
+        return TaskArrays(states)
+
+    def take(self, order):
+        """
+        Get the tasks at the given row numbers, in the given order.
+        """
+        return TaskArrays(self.states[order])
+
+    def task(self, index):
+        """
+        Build the Task object of one row.
+        """
+        return Task.from_state(tuple(self.states[index].tolist()))
+
+    def to_tasks(self):
+        """
+        Build Task objects for all rows.
+        """
+        return [Task.from_state(tuple(one_state)) for one_state in self.states.tolist()]
+
+    def __len__(self):
+        return self.states.shape[0]
+
+
+class LazyTaskList(Sequence):
+    """
+    Read only list of tasks backed by TaskArrays. A Task object is built every time an item is read and is not
+    kept, so mutating it does not change the list. Aggregates should use the arrays attribute directly.
+    """
+    def __init__(self, task_arrays):
+        self.arrays = task_arrays
+
+    def __len__(self):
+        return len(self.arrays)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return LazyTaskList(self.arrays.take(index))
+        return self.arrays.task(index)
+
+    def __repr__(self):
+        return "LazyTaskList({} tasks)".format(len(self))
@@ -1,10 +1,16 @@
+import hashlib
 import json
+import os
 import random
 import argparse
+import tempfile
 from _operator import attrgetter
 
 from task import TaskPriority, Task
-from utils import DEFAULT_END_TIME, DEBUG_HALT
+from utils import DEFAULT_END_TIME, DEBUG_HALT, is_columnar
+
+# Version of the sidecar index format, an index of another version is rebuilt
+TASK_LIST_INDEX_VERSION = 3
 
 
 def generate_random_tasks(num_tasks, max_bandwidth, start_time=0, end_time=DEFAULT_END_TIME, set_priority=None,
@@ -51,6 +57,7 @@ def to_json_file(task_list, out_file):
         target_list.append(task_dict)
     with open(out_file, "w") as fout:
         json.dump(target_list, fout, indent=4)
+    write_task_list_index(out_file, task_list)
 
 
 def from_json_file(in_file: str) -> list:
@@ -69,6 +76,124 @@ def from_json_file(in_file: str) -> list:
     return ret
 
 
+def index_file_name(task_list_file):
+    """
+    get the name of the sidecar index of a task list file
+    """
+    return task_list_file + ".index.npz"
+
+
+def file_checksum(in_file):
+    """
+    get the SHA-256 checksum of a file, as a hex string
+    """
+    digest = hashlib.sha256()
+    with open(in_file, "rb") as fin:
+        for block in iter(lambda: fin.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Stats held as arrays, stored next to the JSON encoded scalar stats in the sidecar index
+_STATS_ARRAYS = ("later_created", "later_work")
+
+
+def task_list_stats(task_arrays):
+    """
+    get summary stats of a task list that was not scheduled yet
+    :param task_arrays: TaskArrays of the task list
+    :return: dictionary of: tasks, time_start and time_end (first created time, latest created time + duration),
+        max_bandwidth, min_bandwidth (largest minimal task bandwidth), total_work (sum of bandwidth * duration), and
+        the arrays later_created (created times, latest first) and later_work (minimal work, minimal bandwidth *
+        duration, of the tasks created at or after each), see load_analysis.makespan_lower_bounds
+    """
+    import numpy as np
+
+    order = np.argsort(task_arrays.created_time, kind="stable")[::-1]  # latest created first
+    ret = {"tasks": len(task_arrays),
+           "later_created": task_arrays.created_time[order],
+           "later_work": np.cumsum(task_arrays.min_bandwidth[order] * task_arrays.total_duration[order])}
+    if len(task_arrays):
+        ret.update(time_start=int(task_arrays.created_time.min()),
+                   time_end=int((task_arrays.created_time + task_arrays.total_duration).max()),
+                   max_bandwidth=int(task_arrays.bandwidth.max()),
+                   min_bandwidth=int(task_arrays.min_bandwidth.max()),
+                   total_work=int((task_arrays.bandwidth * task_arrays.total_duration).sum()))
+    return ret
+
+
+def write_task_list_index(task_list_file, task_list=None):
+    """
+    Write the sidecar index of a task list file: the checksum of the file, the arrival order of its tasks (see
+    arrival_index.ArrivalIndex) and summary stats (see task_list_stats). The index is written to a temporary file
+    first and moved in place, so concurrent readers never see a partial index.
+    :param task_list_file: JSON task list file
+    :param task_list: the tasks of the file (list of tasks or TaskArrays), default load them from the file
+    :return: tuple of (ArrivalIndex, stats dictionary)
+    """
+    import numpy as np
+    from arrival_index import ArrivalIndex
+    from task_arrays import TaskArrays
+
+    checksum = file_checksum(task_list_file)
+    if task_list is None:
+        task_list = from_json_file(task_list_file)
+    task_arrays = task_list.arrays if is_columnar(task_list) else TaskArrays.from_tasks(task_list)
+    arrival_index = ArrivalIndex(task_arrays)
+    stats = task_list_stats(task_arrays)
+    scalar_stats = {key: value for key, value in stats.items() if key not in _STATS_ARRAYS}
+    index_file = index_file_name(task_list_file)
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(index_file)))
+    try:
+        with os.fdopen(fd, "wb") as fout:
+            np.savez(fout, version=TASK_LIST_INDEX_VERSION, checksum=checksum, stats=json.dumps(scalar_stats),
+                     later_created=stats["later_created"], later_work=stats["later_work"],
+                     ids=np.array(arrival_index.ids, dtype=np.int64),
+                     order=np.array(arrival_index.order, dtype=np.int64),
+                     times=np.array(arrival_index.times, dtype=np.int64),
+                     offsets=np.array(arrival_index.offsets, dtype=np.int64))
+        os.replace(tmp_path, index_file)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return arrival_index, stats
+
+
+def load_task_list_index(task_list_file, task_list=None):
+    """
+    Load the sidecar index of a task list file, for the runs that share one arrival stream (not needed by a single
+    run, which groups its own tasks as fast) and for the summary stats that bound a sweep without loading the tasks
+    (see algo_tester.plan_sweep). A missing index, or one that does not match the file (checksum) or the index
+    format, is rebuilt and written again; if it can not be written, the rebuilt index is still returned.
+    :param task_list_file: JSON task list file
+    :param task_list: the tasks of the file (list of tasks or TaskArrays), used to rebuild the index without
+        loading the file again
+    :return: tuple of (ArrivalIndex, stats dictionary, see task_list_stats)
+    """
+    import numpy as np
+    from arrival_index import ArrivalIndex
+
+    index_file = index_file_name(task_list_file)
+    try:
+        with np.load(index_file) as data:
+            if int(data["version"]) == TASK_LIST_INDEX_VERSION and str(data["checksum"]) == file_checksum(
+                    task_list_file):
+                stats = json.loads(str(data["stats"]))
+                stats.update((key, data[key]) for key in _STATS_ARRAYS)
+                return ArrivalIndex.from_arrays(data["ids"], data["order"], data["times"], data["offsets"]), stats
+    except (OSError, KeyError, ValueError):
+        pass  # Missing or unreadable index, rebuild it
+    try:
+        return write_task_list_index(task_list_file, task_list)
+    except OSError:
+        from task_arrays import TaskArrays
+
+        if task_list is None:
+            task_list = from_json_file(task_list_file)
+        task_arrays = task_list.arrays if is_columnar(task_list) else TaskArrays.from_tasks(task_list)
+        return ArrivalIndex(task_arrays), task_list_stats(task_arrays)
+
+
 def compare_lists(src_list, target_list):
     zipped = list(zip(src_list, target_list))
     for (i, j) in zipped:
@@ -0,0 +1,44 @@
+import random
+import unittest
+from functools import partial
+
+from algorithms import preemptive_scheduling_algorithm
+from task import Task, TaskPriority
+from task_gen import generate_random_tasks
+
+
+def _random_task_list(seed, num_tasks=150, max_bandwidth=40, end_time=60):
+    random.seed(seed)
+    return generate_random_tasks(num_tasks, max_bandwidth, end_time=end_time)
+
+
+def _run(algo_fp, task_list, total_bandwidth):
+    """run an algorithm on a fresh copy of a task list, return the sorted completed task states"""
+    completed = algo_fp([Task.from_state(one_task.to_state()) for one_task in task_list], total_bandwidth)
+    return sorted(one_task.to_state() for one_task in completed)
+
+
+class AgingTest(unittest.TestCase):
+    def test_no_rate_is_no_aging(self):
+        task_list = _random_task_list(1)
+        expected = _run(preemptive_scheduling_algorithm, task_list, 20)
+        for aging in ({}, {TaskPriority.REGULAR: 0}, {priority: 1e-9 for priority in TaskPriority}):
+            self.assertEqual(_run(partial(preemptive_scheduling_algorithm, aging=aging), task_list, 20), expected)
+
+    def test_aged_task_is_not_starved(self):
+        # A REGULAR task behind a stream of PREMIUM tasks that each take the whole link
+        starved = Task(bandwidth=10, created_time=0, duration=1, priority=TaskPriority.REGULAR)
+        task_list = [starved] + [Task(bandwidth=10, created_time=t, duration=1, priority=TaskPriority.PREMIUM)
+                                 for t in range(100)]
+        start_times = {}
+        for name, aging in (("none", None), ("aging", {TaskPriority.REGULAR: 0.1})):
+            completed = preemptive_scheduling_algorithm([Task.from_state(one_task.to_state())
+                                                         for one_task in task_list], 10, aging=aging)
+            start_times[name] = next(one_task.actual_start_time for one_task in completed
+                                     if one_task.id == starved.id)
+        self.assertGreaterEqual(start_times["none"], 100)
+        self.assertLess(start_times["aging"], 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
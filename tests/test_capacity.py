@@ -0,0 +1,51 @@
+import random
+import unittest
+
+from algo_tester import AlgoTester, peak_usage
+from algorithms import easy_backfilling_algorithm, proportional_compression_algorithm, simple_greedy_algorithm
+from task_gen import generate_random_tasks
+
+
+def _random_task_list(seed, num_tasks=150, max_bandwidth=40, end_time=60):
+    random.seed(seed)
+    return generate_random_tasks(num_tasks, max_bandwidth, end_time=end_time)
+
+
+class CapacityTest(unittest.TestCase):
+    def setUp(self):
+        self.task_list = _random_task_list(4)
+
+    def assertWithinLink(self, tester):
+        self.assertLessEqual(peak_usage(tester.completed_tasks), tester.total_bandwidth)
+        tester.create_task_matrix()  # halts on an over-allocated time unit
+        self.assertEqual(len({one_task.id for one_task in tester.completed_tasks}), len(self.task_list))
+
+    def test_proportional_compression_within_link(self):
+        tester = AlgoTester.from_task_list(self.task_list, 20)
+        tester.test(proportional_compression_algorithm)
+        # Compressed tasks count with every bandwidth they ran with, not only their last one
+        self.assertTrue(any(len(one_task.bandwidth_segments()) > 1 for one_task in tester.completed_tasks))
+        self.assertWithinLink(tester)
+
+    def test_easy_backfilling_within_link(self):
+        for seed, total_bandwidth in ((4, 40), (10, 45), (11, 80)):
+            self.task_list = _random_task_list(seed)
+            tester = AlgoTester.from_task_list(self.task_list, total_bandwidth)
+            tester.test(easy_backfilling_algorithm)
+            self.assertWithinLink(tester)
+            self.assertTrue(all(one_task.actual_start_time >= one_task.created_time
+                                for one_task in tester.completed_tasks))
+
+    def test_time_quantum_within_link(self):
+        for algo_fp in (simple_greedy_algorithm, proportional_compression_algorithm, easy_backfilling_algorithm):
+            tester = AlgoTester.from_task_list(self.task_list, 20, time_quantum=7, quantum_reference=True)
+            tester.test(algo_fp)
+            self.assertWithinLink(tester)
+            self.assertTrue(all(one_task.actual_start_time >= one_task.created_time
+                                for one_task in tester.completed_tasks))
+            self.assertEqual(tester.quantum_report["peak_bandwidth"], peak_usage(tester.completed_tasks))
+            self.assertIn("end_time_delta", tester.quantum_report)
+
+
+if __name__ == "__main__":
+    unittest.main()
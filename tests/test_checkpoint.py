@@ -0,0 +1,80 @@
+import os
+import random
+import tempfile
+import unittest
+
+from algorithms import preemptive_scheduling_algorithm
+from checkpoint import CheckpointPolicyException, list_timeline, load_checkpoint, state_tasks
+from task import Task, TaskPriority
+from task_gen import generate_random_tasks
+
+AGING = {priority: 0.05 for priority in TaskPriority}
+
+
+def _random_task_list(seed, num_tasks=150, max_bandwidth=40, end_time=60):
+    random.seed(seed)
+    return generate_random_tasks(num_tasks, max_bandwidth, end_time=end_time)
+
+
+def _copy(task_list):
+    return [Task.from_state(one_task.to_state()) for one_task in task_list]
+
+
+def _states(task_list):
+    return sorted(one_task.to_state() for one_task in task_list)
+
+
+def _snapshot_states(timeline_dir):
+    """events number -> comparable state of every snapshot of a timeline"""
+    ret = {}
+    for events_num, path in list_timeline(timeline_dir):
+        state = load_checkpoint(path)
+        ret[events_num] = (state.events_num, state.current_time, state.total_bandwidth,
+                           _states(state.completed_queue), _states(state_tasks(state)))
+    return ret
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.task_list = _random_task_list(2)
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_file = os.path.join(self.work_dir.name, "run.bin")
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_resume_equals_full_run(self):
+        for kwargs in ({}, {"aging": AGING}, {"batch_admission": True}):
+            expected = _states(preemptive_scheduling_algorithm(_copy(self.task_list), 20, **kwargs))
+            # Stop half way, as a crashed run would, then resume from its latest snapshot
+            preemptive_scheduling_algorithm(_copy(self.task_list), 20, self.checkpoint_file, checkpoint_interval=25,
+                                            stop_time=30, **kwargs)
+            resumed = preemptive_scheduling_algorithm(None, None, self.checkpoint_file, resume=True, **kwargs)
+            self.assertEqual(_states(resumed), expected)
+
+    def test_resumed_timeline_continues_the_run(self):
+        full_dir = os.path.join(self.work_dir.name, "full")
+        resumed_dir = os.path.join(self.work_dir.name, "resumed")
+        os.mkdir(full_dir)
+        os.mkdir(resumed_dir)
+        preemptive_scheduling_algorithm(_copy(self.task_list), 20, checkpoint_interval=25, timeline_dir=full_dir)
+        preemptive_scheduling_algorithm(_copy(self.task_list), 20, self.checkpoint_file, checkpoint_interval=25,
+                                        timeline_dir=resumed_dir, stop_time=30)
+        preemptive_scheduling_algorithm(None, None, self.checkpoint_file, checkpoint_interval=25, resume=True,
+                                        timeline_dir=resumed_dir)
+        expected = _snapshot_states(full_dir)
+        self.assertGreater(len(expected), 2)
+        self.assertEqual(_snapshot_states(resumed_dir), expected)
+
+    def test_resume_with_another_policy_fails(self):
+        preemptive_scheduling_algorithm(_copy(self.task_list), 20, self.checkpoint_file, checkpoint_interval=25,
+                                        aging=AGING, stop_time=30)
+        with self.assertRaises(CheckpointPolicyException):
+            preemptive_scheduling_algorithm(None, None, self.checkpoint_file, resume=True)
+        with self.assertRaises(CheckpointPolicyException):
+            preemptive_scheduling_algorithm(None, None, self.checkpoint_file, resume=True, aging=AGING,
+                                            batch_admission=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
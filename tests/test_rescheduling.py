@@ -0,0 +1,80 @@
+import os
+import random
+import tempfile
+import unittest
+
+from algorithms import preemptive_scheduling_algorithm
+from rescheduling import TaskFieldException, UnknownTaskException, apply_task_edits, delta_reschedule
+from task import Task, TaskPriority
+from task_gen import generate_random_tasks
+
+AGING = {priority: 0.05 for priority in TaskPriority}
+
+
+def _random_task_list(seed, num_tasks=150, max_bandwidth=40, end_time=60):
+    random.seed(seed)
+    return generate_random_tasks(num_tasks, max_bandwidth, end_time=end_time)
+
+
+def _copy(task_list):
+    return [Task.from_state(one_task.to_state()) for one_task in task_list]
+
+
+def _states(task_list):
+    return sorted(one_task.to_state() for one_task in task_list)
+
+
+def _late_edits(task_list):
+    """edits of three tasks arriving late in the list: a bandwidth, a priority and an earlier arrival"""
+    late_tasks = sorted(task_list, key=lambda one_task: one_task.created_time)[-3:]
+    priorities = list(TaskPriority)
+    return {late_tasks[0].id: {"bandwidth": max(1, late_tasks[0].bandwidth // 2)},
+            late_tasks[1].id: {"priority": priorities[(priorities.index(late_tasks[1].priority) + 1) % 3]},
+            late_tasks[2].id: {"created_time": late_tasks[2].created_time - 5}}
+
+
+class ReschedulingTest(unittest.TestCase):
+    def setUp(self):
+        self.task_list = _random_task_list(5)
+        self.work_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def _record_timeline(self, **algo_kwargs):
+        timeline_dir = os.path.join(self.work_dir.name, "timeline{}".format(len(os.listdir(self.work_dir.name))))
+        os.mkdir(timeline_dir)
+        preemptive_scheduling_algorithm(_copy(self.task_list), 20, checkpoint_interval=25, timeline_dir=timeline_dir,
+                                        **algo_kwargs)
+        return timeline_dir
+
+    def test_delta_equals_full_rerun(self):
+        edits = _late_edits(self.task_list)
+        for algo_kwargs in ({}, {"aging": AGING}):
+            timeline_dir = self._record_timeline(**algo_kwargs)
+            before = _states(self.task_list)
+            completed, report = delta_reschedule(self.task_list, 20, timeline_dir, edits, **algo_kwargs)
+            expected = preemptive_scheduling_algorithm(apply_task_edits(self.task_list, edits), 20, **algo_kwargs)
+            self.assertIsNotNone(report["snapshot"])  # the edits are late, a snapshot is reused
+            self.assertGreater(report["reused_events"], 0)
+            self.assertEqual(_states(completed), _states(expected))
+            self.assertEqual(_states(self.task_list), before)
+
+    def test_edit_before_every_snapshot_runs_from_scratch(self):
+        timeline_dir = self._record_timeline()
+        first_task = min(self.task_list, key=lambda one_task: one_task.created_time)
+        edits = {first_task.id: {"duration": first_task.total_duration + 3}}
+        completed, report = delta_reschedule(self.task_list, 20, timeline_dir, edits, verify=True)
+        self.assertIsNone(report["snapshot"])
+        self.assertTrue(report["matches"])
+        self.assertEqual(len(completed), len(self.task_list))
+
+    def test_invalid_edits(self):
+        with self.assertRaises(UnknownTaskException):
+            apply_task_edits(self.task_list, {-1: {"bandwidth": 1}})
+        with self.assertRaises(TaskFieldException):
+            apply_task_edits(self.task_list, {self.task_list[0].id: {"score": 0}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import random
+import unittest
+
+from algorithms import RESUMABLE_ALGORITHMS, greedy_compression_algorithm, preemptive_scheduling_algorithm
+from sharding import sharded_run
+from task import Task, TaskPriority
+from task_gen import generate_random_tasks
+
+
+def _random_task_list(seed, num_tasks=200, max_bandwidth=40, end_time=400):
+    random.seed(seed)
+    return generate_random_tasks(num_tasks, max_bandwidth, end_time=end_time)
+
+
+def _light_task_list():
+    """tasks arriving every 3 time units that each leave the link within a few time units"""
+    priorities = list(TaskPriority)
+    return [Task(bandwidth=5 + k % 3 * 5, created_time=3 * k, duration=3 + k % 4, priority=priorities[k % 3])
+            for k in range(120)]
+
+
+def _states(task_list):
+    return sorted(one_task.to_state() for one_task in task_list)
+
+
+class ShardingTest(unittest.TestCase):
+    def setUp(self):
+        self.task_list = _random_task_list(3)
+
+    def test_sharded_equals_sequential(self):
+        for algo_fp in RESUMABLE_ALGORITHMS:
+            before = _states(self.task_list)
+            completed, report = sharded_run(self.task_list, 20, algo_fp, windows_num=4, processes=2, verify=True)
+            self.assertTrue(report["matches"], algo_fp.__name__)
+            self.assertEqual(report["error_bound_ratio"], 0)
+            self.assertEqual(len(completed), len(self.task_list))
+            self.assertEqual(_states(self.task_list), before)
+
+    def test_approximate_error_is_bounded(self):
+        for algo_fp in RESUMABLE_ALGORITHMS:
+            completed, report = sharded_run(self.task_list, 20, algo_fp, windows_num=4, processes=2, verify=True,
+                                            exact=False)
+            self.assertEqual(sorted(one_task.id for one_task in completed),
+                             sorted(one_task.id for one_task in self.task_list))
+            # Only the unverified tasks may differ from the sequential run
+            self.assertEqual(report["mismatched_verified"], 0, algo_fp.__name__)
+            self.assertLessEqual(report["mismatched_tasks"], report["unverified_tasks"])
+
+    def test_approximate_verifies_short_boundary_effects(self):
+        task_list = _light_task_list()
+        for algo_fp in (greedy_compression_algorithm, preemptive_scheduling_algorithm):
+            _, report = sharded_run(task_list, 20, algo_fp, windows_num=4, processes=2, verify=True, exact=False)
+            self.assertGreater(report["reconciled_windows"], 0)
+            self.assertEqual(report["error_bound_ratio"], 0, algo_fp.__name__)
+            self.assertTrue(report["matches"], algo_fp.__name__)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import random
+import unittest
+
+import numpy as np
+
+from algo_tester import AlgoTester
+from algorithms import simple_greedy_algorithm, simple_greedy_arrays
+from task import Task
+from task_arrays import TaskArrays
+from task_gen import generate_random_tasks
+
+
+def _random_task_list(seed, num_tasks=300, max_bandwidth=40, end_time=80):
+    random.seed(seed)
+    return generate_random_tasks(num_tasks, max_bandwidth, end_time=end_time)
+
+
+def _copy(task_list):
+    return [Task.from_state(one_task.to_state()) for one_task in task_list]
+
+
+class ColumnarSimpleGreedyTest(unittest.TestCase):
+    def test_arrays_equal_objects(self):
+        for seed, total_bandwidth in ((6, 40), (7, 60), (8, 200)):
+            task_list = _random_task_list(seed)
+            random.shuffle(task_list)  # tasks arriving at one time slice keep their task list order
+            expected = simple_greedy_algorithm(_copy(task_list), total_bandwidth)
+            task_arrays = TaskArrays.from_tasks(task_list)
+            before = task_arrays.states.copy()
+            completed = simple_greedy_algorithm(task_arrays, total_bandwidth)
+            # Fresh tasks that fit the link take the columnar fast path
+            np.testing.assert_array_equal(completed.states, simple_greedy_arrays(task_arrays, total_bandwidth).states)
+            # Same tasks in the same completion order, with the same state
+            self.assertEqual(completed.states.tolist(), [list(one_task.to_state()) for one_task in expected])
+            np.testing.assert_array_equal(task_arrays.states, before)
+
+    def test_rated_arrays_equal_objects(self):
+        task_list = _random_task_list(9)
+        object_tester = AlgoTester.from_task_list(_copy(task_list), 40)
+        object_tester.test(simple_greedy_algorithm)
+        arrays_tester = AlgoTester.from_task_list(TaskArrays.from_tasks(task_list), 40)
+        arrays_tester.test(simple_greedy_algorithm)
+        self.assertEqual(arrays_tester.scores_dict, object_tester.scores_dict)
+        self.assertEqual(arrays_tester.time_end, object_tester.time_end)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from algorithms import simple_greedy_algorithm
+from task import TaskPriority
+from task_arrays import COLUMN_INDEX
+from trace_import import TraceFormatException, import_trace, load_trace
+
+# (timestamp, bandwidth, duration, tier), not sorted by timestamp
+ROWS = [(105.5, 10, 4, "premium"), (100, 5, 2.5, "regular"), (111, 20, 8, "enterprise"), (99.7, 8, 1, "premium"),
+        (105.5, 12, 3, "regular"), (130, 6, 6, "enterprise"), (101, 4, 2, "enterprise")]
+
+
+class TraceImportTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.out_dir = os.path.join(self.work_dir.name, "trace")
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def _write_csv(self, rows):
+        in_file = os.path.join(self.work_dir.name, "log.csv")
+        with open(in_file, "w", newline="") as fout:
+            writer = csv.writer(fout)
+            writer.writerow(("timestamp", "bandwidth", "duration", "tier"))
+            writer.writerows(rows)
+        return in_file
+
+    def _write_jsonl(self, rows):
+        in_file = os.path.join(self.work_dir.name, "log.jsonl")
+        with open(in_file, "w") as fout:
+            for timestamp, bandwidth, duration, tier in rows:
+                fout.write(json.dumps({"timestamp": timestamp, "bandwidth": bandwidth, "duration": duration,
+                                       "tier": tier}) + "\n")
+        return in_file
+
+    def test_unsorted_rows(self):
+        for in_file in (self._write_csv(ROWS), self._write_jsonl(ROWS)):
+            # Chunks of two rows, so the earliest row is neither in the first chunk nor the first row
+            summary = import_trace(in_file, self.out_dir, time_resolution=2.0, chunk_size=2)
+            task_arrays = load_trace(self.out_dir)
+            # Time 0 is the time unit of the earliest row, on the grid of the first row: 105.5 - 3 * 2
+            self.assertEqual(summary["origin"], 99.5)
+            self.assertEqual(summary["chunks"], 4)
+            self.assertEqual((summary["first_created_time"], summary["last_created_time"]), (0, 15))
+            # Tasks keep their log order and ids, every time of a task is moved with its created time
+            self.assertEqual(task_arrays.id.tolist(), list(range(1, len(ROWS) + 1)))
+            self.assertEqual(task_arrays.created_time.tolist(), [3, 0, 5, 0, 3, 15, 0])
+            self.assertEqual(task_arrays.actual_start_time.tolist(), task_arrays.created_time.tolist())
+            self.assertEqual(task_arrays.actual_end_time.tolist(), [5, 2, 9, 1, 5, 18, 1])
+            self.assertEqual(task_arrays.states[:, COLUMN_INDEX["raw_end_time"]].tolist(), [5, 2, 9, 1, 5, 18, 1])
+            self.assertEqual(task_arrays.preempted_time.tolist(), task_arrays.created_time.tolist())
+            self.assertEqual(task_arrays.priority.tolist(),
+                             [int(TaskPriority[tier.upper()]) for _, _, _, tier in ROWS])
+
+    def test_unsorted_trace_schedules_like_objects(self):
+        import_trace(self._write_csv(ROWS), self.out_dir, chunk_size=3)
+        task_arrays = load_trace(self.out_dir)
+        expected = simple_greedy_algorithm(task_arrays.to_tasks(), 25)
+        completed = simple_greedy_algorithm(task_arrays, 25)
+        self.assertEqual(completed.states.tolist(), [list(one_task.to_state()) for one_task in expected])
+
+    def test_row_before_origin(self):
+        with self.assertRaises(TraceFormatException):
+            import_trace(self._write_csv(ROWS), self.out_dir, origin=100)
+
+
+if __name__ == "__main__":
+    unittest.main()
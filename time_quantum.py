@@ -0,0 +1,160 @@
+"""
+Coarse time quanta for long, sparse timelines.
+The schedulers step over integer time units. Mapping task times into quanta of several time units before a run makes
+the simulated timeline, and the task matrix, scale with the number of quanta. Arrivals are grouped by rounding the
+created time down to its quantum. A task runs from its start time to its end time inclusive, so its duration is set to
+the fewest quanta whose run covers all the time units of the original run, counted from its created time within its
+first quantum. The results are mapped back to time units afterwards, every run within the quanta its run in quanta
+held, so a schedule within the link stays within it. quantization_report describes the error.
+"""
+import numpy as np
+
+from task_arrays import COLUMN_INDEX, TaskArrays
+from utils import is_columnar
+
+_CREATED = COLUMN_INDEX["created_time"]
+_START = COLUMN_INDEX["actual_start_time"]
+_DURATION = COLUMN_INDEX["total_duration"]
+_REMAINING = COLUMN_INDEX["remaining_duration"]
+_RAW_END = COLUMN_INDEX["raw_end_time"]
+_PREEMPTED = COLUMN_INDEX["preempted_time"]
+
+
+def _quantized_duration(durations, quantum, offsets):
+    """
+    fewest quanta whose inclusive run [start, start + duration] covers duration + 1 time units starting offsets time
+    units into the first quantum, at least 1
+    """
+    return np.maximum(1, -(-(offsets + durations + 1) // quantum) - 1)
+
+
+def quantize_task_arrays(task_arrays, quantum):
+    """
+    Map not yet scheduled tasks into time quanta.
+    :param task_arrays: TaskArrays in time units, left untouched
+    :param quantum: time units per quantum
+    :return: new TaskArrays in quanta
+    """
+    ret = task_arrays.copy()
+    states = ret.states
+    offsets = states[:, _CREATED] % quantum
+    states[:, _CREATED] //= quantum
+    states[:, _START] //= quantum
+    states[:, _PREEMPTED] = states[:, _START]
+    states[:, _DURATION] = _quantized_duration(states[:, _DURATION], quantum, offsets)
+    states[:, _REMAINING] = states[:, _DURATION]
+    states[:, _RAW_END] = states[:, _START] + states[:, _DURATION]
+    return ret
+
+
+def restore_task_arrays(task_arrays, quantized_results, quantum):
+    """
+    Map the results of a run in quanta back to time units. A task starts at the beginning of the quantum it was
+    started in, but never before it was created, and keeps its original duration plus any stretch the algorithm
+    added (compression, preemption), scaled back to time units. Its quantized duration covers the time units it is
+    created into its first quantum, so it ends within the last quantum its run in quanta held.
+    :param task_arrays: the tasks in time units, as given to quantize_task_arrays
+    :param quantized_results: TaskArrays of the completed tasks in quanta, in any order
+    :param quantum: time units per quantum
+    :return: new TaskArrays of the completed tasks in time units, in the order of quantized_results
+    """
+    ret = quantized_results.copy()
+    states = ret.states
+    by_id = np.argsort(task_arrays.id)
+    rows = by_id[np.searchsorted(task_arrays.id[by_id], ret.id)]
+    original = task_arrays.states[rows]
+    quantized_duration = _quantized_duration(original[:, _DURATION], quantum, original[:, _CREATED] % quantum)
+    stretch = (quantized_results.actual_end_time - quantized_results.actual_start_time - quantized_duration) * quantum
+    start_times = np.maximum(original[:, _CREATED], states[:, _START] * quantum)
+    states[:, _CREATED] = original[:, _CREATED]
+    states[:, _START] = start_times
+    states[:, _PREEMPTED] = np.maximum(original[:, _CREATED], states[:, _PREEMPTED] * quantum)
+    states[:, _DURATION] = original[:, _DURATION]
+    states[:, _REMAINING] = np.where(states[:, _REMAINING] == quantized_duration, original[:, _DURATION],
+                                     np.minimum(states[:, _REMAINING] * quantum, original[:, _DURATION]))
+    states[:, _RAW_END] = start_times + original[:, _DURATION] + stretch
+    return ret
+
+
+def quantize_tasks(task_list, quantum):
+    """
+    Map not yet scheduled tasks into time quanta, see quantize_task_arrays.
+    :param task_list: list of tasks or TaskArrays, left untouched
+    :return: new tasks of the same kind as task_list
+    """
+    if is_columnar(task_list):
+        return quantize_task_arrays(task_list.arrays, quantum)
+    return quantize_task_arrays(TaskArrays.from_tasks(task_list), quantum).to_tasks()
+
+
+def restore_tasks(task_list, quantized_results, quantum):
+    """
+    Map the results of a run in quanta back to time units, see restore_task_arrays.
+    :param task_list: the tasks in time units, as given to quantize_tasks
+    :param quantized_results: completed tasks in quanta, list of tasks or TaskArrays
+    :return: completed tasks in time units, TaskArrays if the results are columnar, a list of tasks otherwise
+    """
+    original = task_list.arrays if is_columnar(task_list) else TaskArrays.from_tasks(task_list)
+    if is_columnar(quantized_results):
+        return restore_task_arrays(original, quantized_results.arrays, quantum)
+    ret = restore_task_arrays(original, TaskArrays.from_tasks(quantized_results), quantum).to_tasks()
+    # Bandwidth changes apply from the start of their quantum on
+    for restored_task, quantized_task in zip(ret, quantized_results):
+        for change_time, bandwidth in quantized_task.bandwidth_changes:
+            restored_task.change_bandwidth(bandwidth, change_time * quantum)
+    return ret
+
+
+def _time_span(task_list):
+    """(first created time, last end time) of completed tasks"""
+    arrays = task_list.arrays if is_columnar(task_list) else TaskArrays.from_tasks(task_list)
+    return int(arrays.created_time.min()), int(arrays.actual_end_time.max())
+
+
+def quantization_report(task_list, quantized_results, completed_tasks, quantum, total_bandwidth):
+    """
+    Describe the timeline reduction and the error quantization adds to a run.
+    :param task_list: the tasks in time units, list of tasks or TaskArrays
+    :param quantized_results: completed tasks of the run in quanta
+    :param completed_tasks: the same completed tasks mapped back to time units
+    :param quantum: time units per quantum
+    :param total_bandwidth: bandwidth of the link
+    :return: dictionary of: quantum, quanta (time steps simulated) and time_units (time steps the same schedule
+        spans in time units), max_arrival_shift and
+        mean_arrival_shift (time units arrivals were moved back to the start of their quantum, each such unit can
+        add one unit of waiting to the task score), duration_inflation (extra time units the runs hold the
+        bandwidth for in quanta, relative to the original runs), peak_bandwidth (highest bandwidth the schedule
+        in time units uses, within the link when at most total_bandwidth) and total_bandwidth. The score and end
+        time changes against a run in time units are added by reference_deltas.
+    """
+    from algo_tester import peak_usage
+
+    arrays = task_list.arrays if is_columnar(task_list) else TaskArrays.from_tasks(task_list)
+    durations = arrays.total_duration
+    arrival_shifts = arrays.created_time % quantum
+    run_units = (_quantized_duration(durations, quantum, arrival_shifts) + 1) * quantum
+    quanta_start, quanta_end = _time_span(quantized_results)
+    time_start, time_end = _time_span(completed_tasks)
+    return {"quantum": quantum,
+            "quanta": quanta_end - quanta_start + 1,
+            "time_units": time_end - time_start + 1,
+            "max_arrival_shift": int(arrival_shifts.max()),
+            "mean_arrival_shift": float(arrival_shifts.mean()),
+            "duration_inflation": float(run_units.sum() / (durations + 1).sum() - 1),
+            "peak_bandwidth": peak_usage(completed_tasks),
+            "total_bandwidth": total_bandwidth}
+
+
+def reference_deltas(tester, reference):
+    """
+    Compare a run in quanta with the same run in time units. Arrival shifts and duration inflation change the
+    schedule as a whole, so its score and end time can move much more than they suggest.
+    :param tester: AlgoTester after a test with a time quantum
+    :param reference: AlgoTester after a test of the same algorithm and task list in time units
+    :return: dictionary of score_deltas (priority name -> average score change) and end_time_delta
+    """
+    score_deltas = {}
+    for one_prio, (tasks_num, _, avg_score) in tester.scores_dict.items():
+        if tasks_num:
+            score_deltas[one_prio] = avg_score - reference.scores_dict[one_prio][2]
+    return {"score_deltas": score_deltas, "end_time_delta": tester.time_end - reference.time_end}
@@ -0,0 +1,227 @@
+"""
+Import of real traffic logs as task lists.
+A log is a CSV file with a header row or a JSON Lines file, one request per row with a timestamp, bandwidth, duration
+and tier. Rows are read one at a time, quantized to the integer time resolution of the schedulers and written as
+compressed TaskArrays chunks (.npz) of a fixed number of tasks, so logs larger than memory can be imported and the
+chunks loaded back without going through Task objects or JSON.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+from datetime import datetime
+
+import numpy as np
+
+from task import TaskPriority, TaskStatus
+from task_arrays import COLUMN_INDEX, STATE_COLUMNS, TaskArrays
+
+# Default log column names
+DEFAULT_COLUMNS = {"timestamp": "timestamp",
+                   "bandwidth": "bandwidth",
+                   "duration": "duration",
+                   "tier": "tier",
+                   "min_bandwidth": "min_bandwidth",  # optional, default the bandwidth (not compressible)
+                   "link": "link"}  # optional, default link 0
+
+CHUNK_FILE_FORMAT = "chunk_{:06d}.npz"
+
+# Task state columns holding a time, moved together when the trace times are shifted
+TIME_COLUMNS = [COLUMN_INDEX[name] for name in ("created_time", "actual_start_time", "raw_end_time", "preempted_time")]
+
+
+class TraceFormatException(Exception):
+    def __init__(self, line_num, reason):
+        super().__init__("Invalid trace row {}: {}".format(line_num, reason))
+
+
+def read_trace_rows(in_file):
+    """
+    Stream the rows of a CSV (with a header row) or JSON Lines log as dictionaries.
+    :param in_file: log file name, JSON Lines when it ends with .jsonl or .json, CSV otherwise
+    :return: generator of (line number, row dictionary)
+    """
+    with open(in_file, "r", newline="") as fin:
+        if in_file.endswith((".jsonl", ".json")):
+            for line_num, line in enumerate(fin, start=1):
+                if line.strip():
+                    yield line_num, json.loads(line)
+        else:
+            reader = csv.DictReader(fin)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def parse_timestamp(value):
+    """
+    Convert a timestamp to seconds: a number of seconds, or an ISO 8601 date and time.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def parse_tier(value, tier_map=None):
+    """
+    Convert a log tier to a TaskPriority: a name from tier_map, a TaskPriority name or a TaskPriority value.
+    """
+    if tier_map and value in tier_map:
+        value = tier_map[value]
+    if isinstance(value, str) and not value.strip().isdigit():
+        return TaskPriority[value.strip().upper()]
+    return TaskPriority(int(value))
+
+
+def quantize_row(row, columns, origin, time_resolution, bandwidth_unit, tier_map):
+    """
+    Convert one log row to (created time, bandwidth, min bandwidth, duration, priority, link id) in scheduler units.
+    Times are rounded down to the start of their time unit, durations and bandwidths are rounded up, so a quantized
+    task never asks for less than the logged request.
+    """
+    created_time = int(math.floor((parse_timestamp(row[columns["timestamp"]]) - origin) / time_resolution))
+    duration = max(1, int(math.ceil(float(row[columns["duration"]]) / time_resolution)))
+    bandwidth = int(math.ceil(float(row[columns["bandwidth"]]) / bandwidth_unit))
+    min_bandwidth = row.get(columns["min_bandwidth"])
+    if min_bandwidth in (None, ""):
+        min_bandwidth = bandwidth
+    else:
+        min_bandwidth = min(bandwidth, int(math.ceil(float(min_bandwidth) / bandwidth_unit)))
+    link_id = row.get(columns["link"])
+    link_id = 0 if link_id in (None, "") else int(link_id)
+    priority = parse_tier(row[columns["tier"]], tier_map)
+    return created_time, bandwidth, min_bandwidth, duration, priority, link_id
+
+
+def _task_state(task_id, created_time, bandwidth, min_bandwidth, duration, priority, link_id):
+    """Task.to_state values of a new, not yet scheduled task"""
+    return (task_id, bandwidth, bandwidth, min_bandwidth, created_time, created_time, duration, duration,
+            int(priority), 0, created_time + duration, 0, created_time, int(TaskStatus.PENDING), 0, 0, link_id)
+
+
+def import_trace(in_file, out_dir, time_resolution=1.0, bandwidth_unit=1.0, origin=None, chunk_size=1000000,
+                 columns=None, tier_map=None, first_id=1):
+    """
+    Import a traffic log into TaskArrays chunks.
+    :param in_file: CSV or JSON Lines log, see read_trace_rows
+    :param out_dir: directory the chunks are written to, created if missing
+    :param time_resolution: seconds per scheduler time unit
+    :param bandwidth_unit: logged bandwidth per scheduler bandwidth unit
+    :param origin: timestamp of scheduler time 0 in seconds, rows logged before it are rejected. Default the start
+        of the time unit of the earliest row, on the time unit grid of the first row: rows do not have to be sorted
+        by timestamp, and the earliest task is created at time 0
+    :param chunk_size: number of tasks per chunk file
+    :param columns: log column names, merged over DEFAULT_COLUMNS
+    :param tier_map: dictionary of log tier -> TaskPriority name or value, for logs with their own tier names
+    :param first_id: id of the first task, the next tasks get consecutive ids
+    :return: summary dictionary: tasks, chunks, first and last created time, and origin
+    """
+    columns = dict(DEFAULT_COLUMNS, **(columns or {}))
+    os.makedirs(out_dir, exist_ok=True)
+    for chunk_file in trace_chunk_files(out_dir):  # chunks of an earlier import would be loaded with this one
+        os.remove(chunk_file)
+    normalize = origin is None
+    chunk = np.empty((chunk_size, len(STATE_COLUMNS)), dtype=np.int64)  # reused for every chunk
+    chunk_rows = 0
+    chunks_num = 0
+    tasks_num = 0
+    min_time = max_time = None
+
+    def write_chunk():
+        nonlocal chunk_rows, chunks_num
+        TaskArrays(chunk[:chunk_rows]).save(os.path.join(out_dir, CHUNK_FILE_FORMAT.format(chunks_num)))
+        chunks_num += 1
+        chunk_rows = 0
+
+    for line_num, row in read_trace_rows(in_file):
+        try:
+            if origin is None:
+                origin = parse_timestamp(row[columns["timestamp"]])
+            created_time, bandwidth, min_bandwidth, duration, priority, link_id = quantize_row(
+                row, columns, origin, time_resolution, bandwidth_unit, tier_map)
+        except (KeyError, ValueError, TypeError) as e:
+            raise TraceFormatException(line_num, repr(e))
+        if created_time < 0 and not normalize:
+            raise TraceFormatException(line_num, "timestamp before the origin")
+        if bandwidth <= 0:
+            raise TraceFormatException(line_num, "bandwidth must be positive")
+        chunk[chunk_rows] = _task_state(first_id + tasks_num, created_time, bandwidth, min_bandwidth, duration,
+                                        priority, link_id)
+        chunk_rows += 1
+        tasks_num += 1
+        min_time = created_time if min_time is None else min(min_time, created_time)
+        max_time = created_time if max_time is None else max(max_time, created_time)
+        if chunk_rows == chunk_size:
+            write_chunk()
+    if chunk_rows:
+        write_chunk()
+    if normalize and min_time:
+        # A row was logged before the first one: move time 0 to its time unit, by whole time units
+        shift_trace_times(out_dir, -min_time)
+        origin += min_time * time_resolution
+        min_time, max_time = 0, max_time - min_time
+    return {"tasks": tasks_num, "chunks": chunks_num, "first_created_time": min_time,
+            "last_created_time": max_time, "origin": origin}
+
+
+def shift_trace_times(trace_dir, offset):
+    """
+    Add an offset to all the times of the tasks of an imported trace, one chunk at a time.
+    """
+    for chunk_file in trace_chunk_files(trace_dir):
+        task_arrays = TaskArrays.load(chunk_file)
+        task_arrays.states[:, TIME_COLUMNS] += offset
+        task_arrays.save(chunk_file)
+
+
+def trace_chunk_files(trace_dir):
+    """
+    List the chunk files of an imported trace, in import order.
+    """
+    return sorted(os.path.join(trace_dir, file_name) for file_name in os.listdir(trace_dir)
+                  if file_name.startswith("chunk_") and file_name.endswith(".npz"))
+
+
+def iter_trace_chunks(trace_dir):
+    """
+    Load the chunks of an imported trace one at a time.
+    :return: generator of TaskArrays
+    """
+    for chunk_file in trace_chunk_files(trace_dir):
+        yield TaskArrays.load(chunk_file)
+
+
+def load_trace(trace_dir):
+    """
+    Load a whole imported trace.
+    :return: TaskArrays of all tasks, in log order
+    """
+    chunks = list(iter_trace_chunks(trace_dir))
+    if not chunks:
+        return TaskArrays(np.empty((0, len(STATE_COLUMNS)), dtype=np.int64))
+    return TaskArrays.concatenate(chunks)
+
+
+def parse_args():
+    """
+    parse cmd line args
+    """
+    parser = argparse.ArgumentParser(description='Import a traffic log as task list chunks.')
+    parser.add_argument('in_file', type=str, help='CSV or JSON Lines traffic log')
+    parser.add_argument('out_dir', type=str, help='Output directory of the task list chunks')
+    parser.add_argument('--time_resolution', type=float, default=1.0, help='Seconds per scheduler time unit')
+    parser.add_argument('--bandwidth_unit', type=float, default=1.0, help='Logged bandwidth per bandwidth unit')
+    parser.add_argument('--origin', type=float, default=None, help='Timestamp of time 0, default the earliest row')
+    parser.add_argument('--chunk_size', type=int, default=1000000, help='Tasks per chunk file')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    summary = import_trace(args.in_file, args.out_dir, time_resolution=args.time_resolution,
+                           bandwidth_unit=args.bandwidth_unit, origin=args.origin, chunk_size=args.chunk_size)
+    print("Imported {tasks} tasks in {chunks} chunks, created times {first_created_time}-{last_created_time}"
+          .format(**summary))
@@ -1,3 +1,6 @@
+import sys
+
+
 def DEBUG_HALT():
     assert 0 == 1, "DEBUG_HALT"
 
@@ -7,3 +10,12 @@ def ASSERT(stmt):
 
 
 DEFAULT_END_TIME = 0xFF
+
+
+def is_columnar(obj):
+    """
+    Check if obj is a TaskArrays or LazyTaskList. Columnar tasks can only exist once task_arrays was imported, so
+    the check never imports numpy for plain task lists.
+    """
+    task_arrays = sys.modules.get("task_arrays")
+    return task_arrays is not None and isinstance(obj, (task_arrays.TaskArrays, task_arrays.LazyTaskList))